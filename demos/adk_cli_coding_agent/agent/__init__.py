@@ -1,7 +1,19 @@
-"""Coding agent package for file system operations with ADK."""
+"""Coding agent package for file system operations with ADK.
 
+The `agent` submodule imports ADK, which takes over a second, so it is only
+imported when first accessed (`coding_agent.agent` or `from coding_agent
+import agent`). The CLI imports it in the background while the prompt is shown.
+"""
+
+import atexit
+import importlib
 import logging
+import logging.handlers
+import multiprocessing
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,13 +21,67 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def setup_logging(level=logging.INFO, log_file='coding_agent.log', quiet_adk=True):
+class RateLimitFilter(logging.Filter):
+    """Drops records from a logger once it exceeds a rate, per logger name.
+
+    Each logger gets a token bucket of `burst` records refilled at `rate` per
+    second. Records at `min_level_kept` or above always pass. The number of
+    dropped records is reported on the next record that gets through.
+    """
+
+    def __init__(self, rate: float = 50.0, burst: int = 200, min_level_kept: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.min_level_kept = min_level_kept
+        self._buckets: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.min_level_kept:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            # [tokens, last refill time, dropped since last kept record]
+            bucket = self._buckets.setdefault(record.name, [self.burst, now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            dropped, bucket[2] = bucket[2], 0
+        if dropped:
+            record.msg = f"[{dropped} earlier records dropped by rate limit] {record.msg}"
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats each record before enqueueing it. The queue
+    never leaves the process, so records can be passed through unchanged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level=logging.INFO, log_file='coding_agent.log', quiet_adk=True,
+                  max_bytes=10 << 20, backup_count=3, rate_limit=50.0):
     """Configure logging for the coding agent package.
 
+    Records are put on a queue by the logging call and formatted and written
+    by a background thread, so logging never waits on the terminal or disk.
+
     Args:
         level: Logging level (default: INFO)
         log_file: Path to log file (default: 'coding_agent.log')
         quiet_adk: If True, set ADK loggers to WARNING level (default: True)
+        max_bytes: Size at which the log file is rotated (default: 10 MiB)
+        backup_count: Number of rotated log files kept (default: 3)
+        rate_limit: Records per second each logger may emit below WARNING
+            before records are dropped, or None for no limit (default: 50)
     """
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -28,17 +94,30 @@ def setup_logging(level=logging.INFO, log_file='coding_agent.log', quiet_adk=Tru
     console_handler.setLevel(level)
     console_handler.setFormatter(detailed_formatter)
 
-    # File handler (detailed format)
+    # File handler (detailed format), rotated by size
     log_path = Path(log_file)
-    file_handler = logging.FileHandler(log_path)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+    )
     file_handler.setLevel(logging.DEBUG)  # Log everything to file
     file_handler.setFormatter(detailed_formatter)
 
+    # Logging calls only enqueue; the listener thread formats and writes
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter(rate=rate_limit, burst=int(rate_limit * 4)))
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Flush queued records at exit
+    atexit.register(listener.stop)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(queue_handler)
 
     # Quiet down noisy libraries
     if quiet_adk:
@@ -52,11 +131,21 @@ def setup_logging(level=logging.INFO, log_file='coding_agent.log', quiet_adk=Tru
     return logging.getLogger(__name__)
 
 
-# Initialize logging
-logger = setup_logging()
-logger.info("Coding agent package initialized")
+# Initialize logging, except in worker processes (e.g. the search pool), which
+# import the package only to run tool code
+if multiprocessing.parent_process() is None:
+    logger = setup_logging()
+    logger.info("Coding agent package initialized")
+else:
+    logger = logging.getLogger(__name__)
+
+
+def __getattr__(name):
+    # Import the agent lazily, after logging is configured
+    if name == "agent":
+        # `from . import agent` would call back into this function
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Import agent after logging is configured
-from . import agent
 
-__all__ = ['agent', 'logger', 'setup_logging']
+__all__ = ['agent', 'logger', 'setup_logging', 'RateLimitFilter']
@@ -1,213 +1,164 @@
 #!/usr/bin/env python3
-"""Interactive CLI runner for the coding agent with colorful output."""
+"""Interactive CLI runner for the coding agent with colorful output.
 
+ADK and the agent take over a second to import, so they are imported on a
+background thread while the prompt is shown; only a turn sent before they
+are ready waits for them.
+"""
+
+import argparse
 import asyncio
 import json
-from typing import Any
-from google.genai import types
-from google.adk.runners import InMemoryRunner
-from google.adk.utils.context_utils import Aclosing
-
-from coding_agent.agent import coding_agent
-
-
-# ANSI color codes for terminal output
-class Colors:
-    """ANSI color codes for terminal formatting."""
-
-    # Text colors
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    GRAY = '\033[90m'
-
-    # Styles
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-
-    # Reset
-    RESET = '\033[0m'
+import logging
+import signal
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from coding_agent.cache import file_cache
+from coding_agent.concurrency import ainput, offload
+from coding_agent.config import AGENT_NAME, MODEL
+from coding_agent.render import Renderer, use_color
+from coding_agent.search import warm_index
+
+
+logger = logging.getLogger(__name__)
+
+# Where CLI sessions are stored, relative to the working directory
+DEFAULT_SESSION_DB = ".coding_agent/sessions.sqlite"
+
+# Where per-turn metrics are appended, one JSON object per line
+DEFAULT_TRACE_FILE = ".coding_agent/trace.jsonl"
+
+
+def import_runtime() -> None:
+    """Import ADK and the agent (the slow part of startup)."""
+    import coding_agent.agent  # noqa: F401
+    import coding_agent.sessions  # noqa: F401
+    import google.adk.agents.run_config  # noqa: F401
+    import google.adk.artifacts  # noqa: F401
+    import google.adk.memory  # noqa: F401
+    import google.adk.runners  # noqa: F401
+    import google.adk.utils.context_utils  # noqa: F401
+
+
+class AgentRuntime:
+    """The ADK runner and session store used by the CLI."""
+
+    def __init__(self, db_path: str, trace_path: str | None):
+        from google.adk.artifacts import InMemoryArtifactService
+        from google.adk.memory import InMemoryMemoryService
+        from google.adk.runners import Runner
+
+        from coding_agent.agent import coding_agent, governor, metrics, tool_timer
+        from coding_agent.sessions import SqliteSessionService
+
+        self.governor = governor
+        self.metrics = metrics
+        self.tool_timer = tool_timer
+        metrics.trace_path = Path(trace_path) if trace_path else None
+
+        # Create runner with the agent, persisting sessions to SQLite
+        self.session_service = SqliteSessionService(db_path)
+        self.runner = Runner(
+            app_name=coding_agent.name,
+            agent=coding_agent,
+            session_service=self.session_service,
+            artifact_service=InMemoryArtifactService(),
+            memory_service=InMemoryMemoryService()
+        )
 
     @classmethod
-    def color(cls, text: str, color: str, bold: bool = False) -> str:
-        """Apply color to text."""
-        style = cls.BOLD if bold else ''
-        return f"{style}{color}{text}{cls.RESET}"
-
-
-def print_header(text: str):
-    """Print a header with formatting."""
-    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{text.center(60)}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.RESET}\n")
-
-
-def print_section(title: str):
-    """Print a section divider."""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}▶ {title}{Colors.RESET}")
-    print(f"{Colors.GRAY}{'─'*60}{Colors.RESET}")
-
-
-def print_event(event_type: str, author: str | None = None):
-    """Print event metadata."""
-    icon_map = {
-        'ModelTurn': '🤖',
-        'ToolUse': '🔧',
-        'ToolResult': '✅',
-        'Error': '❌',
-        'TurnComplete': '✨'
-    }
-    icon = icon_map.get(event_type, '📨')
-
-    event_color = Colors.YELLOW if 'Tool' in event_type else Colors.CYAN
-    print(f"\n{icon} {Colors.color(event_type, event_color, bold=True)}", end='')
-
-    if author:
-        print(f" {Colors.GRAY}[{author}]{Colors.RESET}", end='')
-    print()
-
-
-def print_text(text: str):
-    """Print assistant text response."""
-    print(f"{Colors.GREEN}💬 Response:{Colors.RESET}")
-    # Indent the text for better readability
-    for line in text.split('\n'):
-        print(f"   {line}")
-
-
-def truncate_arg(value: Any, max_len: int = 20) -> str:
-    """Truncate argument value if too long."""
-    str_value = str(value)
-    if len(str_value) > max_len:
-        return f"{str_value[:max_len]}..."
-    return str_value
-
-
-def print_tool_call(name: str, args: dict):
-    """Print tool call information in concise function-call format."""
-    if args:
-        # Format as function call with truncated args
-        arg_strs = [f"{k}={truncate_arg(v)}" for k, v in args.items()]
-        args_display = ", ".join(arg_strs)
-        print(f"{Colors.MAGENTA}🔧 {Colors.BOLD}{name}({args_display}){Colors.RESET}")
-    else:
-        print(f"{Colors.MAGENTA}🔧 {Colors.BOLD}{name}(){Colors.RESET}")
-
-
-def render_plan(plan_data: dict):
-    """Render a plan in a special visual format.
-
-    Args:
-        plan_data: Plan data structure with title and tasks
-    """
-    if not plan_data or "plan" not in plan_data:
-        return
-
-    plan = plan_data.get("plan")
-    if not plan:
-        return
-
-    # Print plan header
-    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.CYAN}📋 PLAN: {plan['title']}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{'='*60}{Colors.RESET}\n")
-
-    # Calculate progress
-    completed_count = sum(1 for t in plan["tasks"] if t["completed"])
-    total_count = len(plan["tasks"])
-    progress_pct = (completed_count / total_count * 100) if total_count > 0 else 0
-
-    # Progress bar
-    bar_width = 40
-    filled = int(bar_width * completed_count / total_count) if total_count > 0 else 0
-    bar = '█' * filled + '░' * (bar_width - filled)
-    print(f"{Colors.GRAY}Progress: [{Colors.GREEN}{bar}{Colors.GRAY}] {completed_count}/{total_count} ({progress_pct:.0f}%){Colors.RESET}\n")
-
-    # Print tasks
-    for task in plan["tasks"]:
-        task_id = task["id"]
-        description = task["description"]
-        completed = task["completed"]
-
-        if completed:
-            # Use dim/gray text for completed tasks
-            print(f"{Colors.GREEN}  ✓ [{task_id}] {Colors.GRAY}{description}{Colors.RESET}")
+    async def start(cls, db_path: str, trace_path: str | None, user_id: str, session_id: str,
+                    resume: bool = False):
+        """Import ADK off the event loop, then open or create the session.
+
+        Returns:
+            The runtime and the session, which is None if a resumed session does not exist
+        """
+        await asyncio.get_running_loop().run_in_executor(None, import_runtime)
+        runtime = cls(db_path, trace_path)
+        if resume:
+            session = await runtime.session_service.get_session(
+                app_name=runtime.runner.app_name,
+                user_id=user_id,
+                session_id=session_id
+            )
         else:
-            print(f"{Colors.YELLOW}  ○ [{task_id}] {Colors.WHITE}{description}{Colors.RESET}")
+            session = await runtime.session_service.create_session(
+                app_name=runtime.runner.app_name,
+                user_id=user_id,
+                session_id=session_id
+            )
+        return runtime, session
 
-    print(f"\n{Colors.GRAY}{'─'*60}{Colors.RESET}\n")
+    async def close(self, session_id: str) -> None:
+        """Close the runner and session store and log context usage."""
+        await self.runner.close()
+        self.session_service.close()
+        self.governor.log_usage(session_id)
 
 
-def print_tool_response(name: str, response: Any, verbose: bool = False):
-    """Print tool response information.
+async def warm_search_index(stop: threading.Event):
+    """Refresh the search index of the working directory, if a search has created one.
 
-    Args:
-        name: Tool name
-        response: Tool response
-        verbose: If True, show full response. If False, show checkmark/error only.
+    Runs each time the prompt is shown. Setting stop ends the refresh early,
+    so neither the next turn nor exiting waits for it.
     """
-    # Check if this is a plan-related response and render specially
-    if isinstance(response, dict) and "plan" in response and response.get("plan"):
-        # Always render plan visually
-        render_plan(response)
-        return
-
-    if verbose:
-        print(f"{Colors.GREEN}✅ {Colors.BOLD}{name}{Colors.RESET}")
-        # Format the response nicely
-        if isinstance(response, dict):
-            print(f"{Colors.GRAY}   Result:{Colors.RESET}")
-            formatted_response = json.dumps(response, indent=4)
-            for line in formatted_response.split('\n'):
-                print(f"      {line}")
-        elif isinstance(response, list):
-            print(f"{Colors.GRAY}   Result:{Colors.RESET}")
-            formatted_response = json.dumps(response, indent=4)
-            for line in formatted_response.split('\n'):
-                print(f"      {line}")
-        else:
-            print(f"{Colors.GRAY}   Result:{Colors.RESET} {response}")
+    started = time.perf_counter()
+    try:
+        counts = await offload(warm_index)(stop)
+    except Exception:
+        logger.exception("Search index warm-up failed")
     else:
-        # Concise mode: just show success/failure
-        if isinstance(response, dict) and 'error' in response:
-            print(f"{Colors.RED}✗ {name} failed{Colors.RESET}")
-        else:
-            print(f"{Colors.GREEN}✓ {name}{Colors.RESET}")
-
-
-def print_error(message: str):
-    """Print error message."""
-    print(f"{Colors.RED}❌ ERROR:{Colors.RESET} {message}")
+        # None until a search has created the index, or if it cannot be written
+        if counts is not None and not counts["stopped"]:
+            # Quiet unless something changed, as this runs at every prompt
+            level = logging.INFO if counts["updated"] or counts["removed"] else logging.DEBUG
+            logger.log(level, "Search index warmed in %.1f s (%d files updated, %d removed)",
+                       time.perf_counter() - started, counts["updated"], counts["removed"])
 
 
-def print_finish(reason: str):
-    """Print turn completion message."""
-    # Simple newline for cleaner output
-    print()
+async def run_cli(resume_session_id: str | None = None, db_path: str = DEFAULT_SESSION_DB,
+                  color: bool = True, trace_path: str | None = DEFAULT_TRACE_FILE):
+    """Run the coding agent in interactive CLI mode.
 
-
-async def run_cli():
-    """Run the coding agent in interactive CLI mode."""
-    # Session IDs for the conversation
+    Args:
+        resume_session_id: ID of a stored session to continue, or None to start a new one
+        db_path: SQLite database holding stored sessions
+        color: If False, print no ANSI color codes
+        trace_path: JSONL file per-turn metrics are appended to, or None to not write one
+    """
     user_id = "cli_user"
-    session_id = "coding_session"
+    out = Renderer(color=color)
+    c = out.colors
 
     # Verbose mode for tool responses (default: False for concise output)
     verbose_responses = False
 
-    # Create runner with the agent
-    runner = InMemoryRunner(agent=coding_agent, app_name=coding_agent.name)
-
-    # Create session
-    await runner.session_service.create_session(
-        app_name=runner.app_name,
-        user_id=user_id,
-        session_id=session_id
-    )
+    if resume_session_id:
+        # Resuming needs the stored events, so wait for ADK here
+        load_started = time.perf_counter()
+        runtime, session = await AgentRuntime.start(
+            db_path, trace_path, user_id, resume_session_id, resume=True
+        )
+        if session is None:
+            out.error(f"No stored session with ID {resume_session_id} in {db_path}")
+            out.flush()
+            await runtime.close(resume_session_id)
+            return
+        load_ms = (time.perf_counter() - load_started) * 1000
+        session_id = session.id
+        runtime_ready = asyncio.get_running_loop().create_future()
+        runtime_ready.set_result((runtime, session))
+    else:
+        # Load ADK and create the session in the background
+        session_id = uuid.uuid4().hex
+        runtime_ready = asyncio.ensure_future(
+            AgentRuntime.start(db_path, trace_path, user_id, session_id)
+        )
 
     # Print ASCII art banner
     ascii_art = """
@@ -229,43 +180,48 @@ async def run_cli():
     ║                                                           ║
     ╚═══════════════════════════════════════════════════════════╝
     """
-    print(f"{Colors.CYAN}{Colors.BOLD}{ascii_art}{Colors.RESET}")
-
-    print(f"\n{Colors.CYAN}Agent:{Colors.RESET} {Colors.BOLD}{coding_agent.name}{Colors.RESET}")
-    print(f"{Colors.CYAN}Model:{Colors.RESET} {coding_agent.model}")
-    print(f"{Colors.CYAN}Output:{Colors.RESET} {'Verbose' if verbose_responses else 'Concise'} mode")
-    print(f"\n{Colors.GRAY}Commands:{Colors.RESET}")
-    print(f"  • {Colors.YELLOW}exit/quit{Colors.RESET} - Exit the assistant")
-    print(f"  • {Colors.YELLOW}verbose{Colors.RESET} - Toggle verbose tool responses")
-    print(f"\n{Colors.GRAY}File tools:{Colors.RESET}")
-    print(f"  • read_file, write_file, update_file, list_directory")
-    print(f"\n{Colors.GRAY}Planning tools:{Colors.RESET}")
-    print(f"  • create_plan, update_plan, get_plan, reset_plan")
-    print()
-
-    while True:
-        # Get user input
+    out.write(f"{c.CYAN}{c.BOLD}{ascii_art}{c.RESET}")
+
+    out.write(f"\n{c.CYAN}Agent:{c.RESET} {c.BOLD}{AGENT_NAME}{c.RESET}")
+    out.write(f"{c.CYAN}Model:{c.RESET} {MODEL}")
+    out.write(f"{c.CYAN}Output:{c.RESET} {'Verbose' if verbose_responses else 'Concise'} mode")
+    if resume_session_id:
+        out.write(f"{c.CYAN}Session:{c.RESET} {session_id} "
+                  f"{c.GRAY}(resumed with the last {len(session.events)} events, ready in {load_ms:.0f} ms){c.RESET}")
+    else:
+        out.write(f"{c.CYAN}Session:{c.RESET} {session_id} "
+                  f"{c.GRAY}(resume with --resume {session_id}){c.RESET}")
+    out.write(f"\n{c.GRAY}Commands:{c.RESET}")
+    out.write(f"  • {c.YELLOW}exit/quit{c.RESET} - Exit the assistant")
+    out.write(f"  • {c.YELLOW}verbose{c.RESET} - Toggle verbose tool responses")
+    out.write(f"  • {c.YELLOW}stats{c.RESET} - Show p50/p95 turn latency, tokens and tool times")
+    out.write(f"\n{c.GRAY}File tools:{c.RESET}")
+    out.write(f"  • read_file, write_file, update_file, apply_edits, list_directory, search_files")
+    out.write(f"  • undo_turn, undo_session")
+    out.write(f"\n{c.GRAY}Planning tools:{c.RESET}")
+    out.write(f"  • create_plan, update_plan, get_plan, reset_plan")
+    out.write()
+    out.flush()
+
+    async def wait_for_runtime():
+        """Wait for the background ADK load; cancelling the wait leaves the load running."""
         try:
-            user_input = input(f"{Colors.BOLD}{Colors.BLUE}[You]:{Colors.RESET} ")
-        except (EOFError, KeyboardInterrupt):
-            print(f"\n{Colors.YELLOW}Exiting...{Colors.RESET}")
-            break
-
-        # Check for exit command
-        if user_input.strip().lower() in ["exit", "quit", "q"]:
-            print(f"{Colors.YELLOW}Goodbye!{Colors.RESET}")
-            break
+            runtime, _ = await asyncio.shield(runtime_ready)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Agent failed to load: {e}") from e
+        return runtime
 
-        # Check for verbose toggle
-        if user_input.strip().lower() == "verbose":
-            verbose_responses = not verbose_responses
-            mode = "verbose" if verbose_responses else "concise"
-            print(f"{Colors.CYAN}Output mode set to: {Colors.BOLD}{mode}{Colors.RESET}\n")
-            continue
+    async def run_turn(user_input: str):
+        """Run one turn of the agent, printing its events as they arrive."""
+        turn_started = time.perf_counter()
+        runtime = await wait_for_runtime()
+        metrics, tool_timer = runtime.metrics, runtime.tool_timer
 
-        # Skip empty inputs
-        if not user_input.strip():
-            continue
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.adk.utils.context_utils import Aclosing
+        from google.genai import types
 
         # Create message content
         message = types.Content(
@@ -273,63 +229,192 @@ async def run_cli():
             parts=[types.Part(text=user_input)]
         )
 
-        # Run the agent and stream events
-        try:
-            print()  # Add blank line before output
+        first_token = None
+        # Whether the text of the current model response was streamed
+        streamed_text = False
+        # Function calls already shown from partial events
+        shown_calls = set()
 
+        metrics.start_turn(session_id)
+        interrupted = False
+        try:
             async with Aclosing(
-                runner.run_async(
+                runtime.runner.run_async(
                     user_id=user_id,
                     session_id=session_id,
-                    new_message=message
+                    new_message=message,
+                    # Partial events carry text deltas as the model produces them
+                    run_config=RunConfig(streaming_mode=StreamingMode.SSE)
                 )
             ) as event_stream:
                 async for event in event_stream:
 
                     # Handle content parts
                     if event.content and event.content.parts:
+                        if first_token is None and event.author != "user":
+                            first_token = time.perf_counter() - turn_started
+
                         for part in event.content.parts:
-                            # Print text content
+                            # Print text content; the final event repeats streamed text
                             if part.text:
-                                print_text(part.text)
+                                if event.partial:
+                                    out.text_delta(part.text)
+                                    streamed_text = True
+                                elif not streamed_text:
+                                    out.text(part.text)
 
-                            # Print function calls
+                            # Print function calls as soon as they are decoded
                             if part.function_call:
-                                print_tool_call(
-                                    part.function_call.name,
-                                    part.function_call.args
-                                )
+                                call = part.function_call
+                                key = call.id or (call.name, json.dumps(call.args, sort_keys=True, default=str))
+                                if key not in shown_calls:
+                                    shown_calls.add(key)
+                                    out.tool_call(call.name, call.args)
 
                             # Print function responses
                             if part.function_response:
                                 response = getattr(part.function_response, 'response', None)
-                                print_tool_response(
+                                out.tool_response(
                                     part.function_response.name,
                                     response,
-                                    verbose=verbose_responses
+                                    verbose=verbose_responses,
+                                    latency=tool_timer.pop(part.function_response.id)
                                 )
 
+                    if not event.partial:
+                        streamed_text = False
+                        shown_calls.clear()
+
                     # Print error information if present
                     if event.error_message:
-                        print_error(event.error_message)
+                        out.error(event.error_message)
 
                     # Print finish reason if turn is complete
                     if event.turn_complete and event.finish_reason:
-                        print_finish(event.finish_reason)
+                        out.finish(event.finish_reason)
+
+                    # One write per event
+                    out.flush()
+        except asyncio.CancelledError:
+            interrupted = True
+            raise
+        finally:
+            metrics.end_turn(session_id, time.perf_counter() - turn_started, first_token, interrupted)
+
+        out.turn_stats(first_token, time.perf_counter() - turn_started)
+        out.flush()
+
+    # Ctrl-C cancels whatever the CLI is waiting for: a turn or the prompt
+    loop = asyncio.get_running_loop()
+    active: asyncio.Future | None = None
+
+    def interrupt():
+        if active is not None and not active.done():
+            active.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except NotImplementedError:
+        # No asyncio signal handlers on Windows; Ctrl-C stays KeyboardInterrupt
+        pass
+
+    warm_up_stop = threading.Event()
+    warm_up: asyncio.Future | None = None
+
+    while True:
+        # Fully refresh the index for search_files while the user types
+        if warm_up is None or warm_up.done():
+            warm_up_stop = threading.Event()
+            warm_up = asyncio.ensure_future(warm_search_index(warm_up_stop))
+
+        # Get user input
+        try:
+            active = asyncio.ensure_future(ainput(f"{c.BOLD}{c.BLUE}[You]:{c.RESET} "))
+            user_input = await active
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            print(f"\n{c.YELLOW}Exiting...{c.RESET}")
+            break
+        # Searches during the turn update the index themselves
+        warm_up_stop.set()
 
+        # Check for exit command
+        if user_input.strip().lower() in ["exit", "quit", "q"]:
+            print(f"{c.YELLOW}Goodbye!{c.RESET}")
+            break
+
+        # Check for verbose toggle
+        if user_input.strip().lower() == "verbose":
+            verbose_responses = not verbose_responses
+            mode = "verbose" if verbose_responses else "concise"
+            print(f"{c.CYAN}Output mode set to: {c.BOLD}{mode}{c.RESET}\n")
+            continue
+
+        # Show latency and token percentiles for this run
+        if user_input.strip().lower() == "stats":
+            try:
+                active = asyncio.ensure_future(wait_for_runtime())
+                runtime = await active
+            except asyncio.CancelledError:
+                out.write(f"{c.YELLOW}Interrupted{c.RESET}\n")
+            except Exception as e:
+                out.error(str(e))
+            else:
+                out.stats(runtime.metrics.summary())
+            out.flush()
+            continue
+
+        # Skip empty inputs
+        if not user_input.strip():
+            continue
+
+        # Run the agent and stream events
+        try:
+            print()  # Add blank line before output
+            active = asyncio.ensure_future(run_turn(user_input))
+            await active
+        except asyncio.CancelledError:
+            out.end_text()
+            out.write(f"{c.YELLOW}Interrupted{c.RESET}\n")
+            out.flush()
         except Exception as e:
-            print_error(str(e))
+            out.error(str(e))
             import traceback
-            print(f"{Colors.GRAY}{traceback.format_exc()}{Colors.RESET}")
-
-    # Close the runner
-    await runner.close()
-    print(f"\n{Colors.CYAN}Session closed. Goodbye!{Colors.RESET}\n")
+            out.write(f"{c.GRAY}{traceback.format_exc()}{c.RESET}")
+            out.flush()
+
+    try:
+        loop.remove_signal_handler(signal.SIGINT)
+    except NotImplementedError:
+        pass
+    if not warm_up.done():
+        # The worker thread sees the flag and returns; nothing waits for it here
+        warm_up_stop.set()
+        warm_up.cancel()
+
+    # Close the runner, if ADK finished loading
+    if runtime_ready.done() and not runtime_ready.cancelled() and runtime_ready.exception() is None:
+        runtime, _ = runtime_ready.result()
+        await runtime.close(session_id)
+    else:
+        runtime_ready.cancel()
+    file_cache.log_stats()
+    print(f"\n{c.CYAN}Session closed. Goodbye!{c.RESET}\n")
 
 
 def main():
     """Entry point for the CLI."""
-    asyncio.run(run_cli())
+    parser = argparse.ArgumentParser(description="Interactive coding agent")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="Continue a stored session")
+    parser.add_argument("--db", default=DEFAULT_SESSION_DB, help="SQLite database for stored sessions")
+    parser.add_argument("--trace", default=DEFAULT_TRACE_FILE,
+                        help="JSONL file for per-turn metrics (empty string to disable)")
+    parser.add_argument("--no-color", action="store_true",
+                        help="Print plain text (default when output is not a terminal or NO_COLOR is set)")
+    args = parser.parse_args()
+
+    color = not args.no_color and use_color(sys.stdout)
+    asyncio.run(run_cli(resume_session_id=args.resume, db_path=args.db, color=color,
+                        trace_path=args.trace or None))
 
 
 if __name__ == "__main__":
@@ -3,11 +3,20 @@
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 
+from coding_agent.compaction import ContextCompactor
+from coding_agent.config import AGENT_NAME, MODEL
+from coding_agent.concurrency import ToolTimer, offload
+from coding_agent.governor import ToolResultGovernor
+from coding_agent.metrics import TurnMetrics
 from coding_agent.tools import (
     read_file,
     write_file,
     update_file,
+    apply_edits,
     list_directory,
+    search_files,
+    undo_turn,
+    undo_session,
     print_affirming_message,
     create_plan,
     update_plan,
@@ -16,10 +25,22 @@ from coding_agent.tools import (
 )
 
 
+# Keeps oversized tool results out of the conversation history
+governor = ToolResultGovernor()
+
+# Per-call tool latency, reported by the CLI
+tool_timer = ToolTimer()
+
+# Per-turn latency and token records; the CLI sets the trace file
+metrics = TurnMetrics(tool_timer)
+
+# Drops superseded file reads and summarizes old turns before each model call
+compactor = ContextCompactor()
+
 # Create the coding agent with file system tools
 coding_agent = Agent(
-    name="coding_assistant",
-    model="gemini-2.5-flash",
+    name=AGENT_NAME,
+    model=MODEL,
     description=(
         "A helpful coding assistant that can read and write files on the filesystem. "
         "I can help you read file contents, create new files, update existing files, "
@@ -28,6 +49,17 @@ coding_agent = Agent(
     ),
     instruction="""You are a helpful coding assistant with file system and planning capabilities.
 
+SEARCH GUIDANCE:
+- To find where something is defined or used, call search_files() once instead of reading files one by one
+- Then use read_file() with offset/limit to read just the relevant part of each hit
+
+EDITING GUIDANCE:
+- When making several changes to one file, send them together in a single apply_edits() call
+- Pass the sha256 returned by read_file() or the previous edit as expected_sha256, so edits to a file that changed underneath you are rejected
+- Edits return a diff of what changed; there is no need to read the file again to verify an edit
+- To change just one match, pass occurrence=N or a start_line/end_line range instead of widening old_text
+- File changes are journaled: to roll back, call undo_turn() (the last turn's changes) or undo_session() instead of rewriting files by hand
+
 PLANNING GUIDANCE:
 - For any multi-step task (3+ steps), ALWAYS create a plan first using create_plan()
 - Break down complex tasks into clear, actionable steps
@@ -49,16 +81,34 @@ User: "Help me build a REST API"
 3. Continue with remaining tasks
 4. Once all tasks are done, reset_plan()
 
-Use the planning tools proactively to provide clear visibility into your work progress.""",
+Use the planning tools proactively to provide clear visibility into your work progress.
+
+LARGE RESULTS:
+- Tool results that are too large are truncated and include a "continuation" handle
+- Prefer narrowing the request (read_file offset/limit, search_files file_glob) over paging through a truncated result with read_continuation()""",
     tools=[
-        FunctionTool(func=read_file),
-        FunctionTool(func=write_file),
-        FunctionTool(func=update_file),
-        FunctionTool(func=list_directory),
+        # File tools block on disk I/O, so they run on a thread pool and the
+        # calls of one model turn overlap
+        FunctionTool(func=offload(read_file)),
+        FunctionTool(func=offload(write_file)),
+        FunctionTool(func=offload(update_file)),
+        FunctionTool(func=offload(apply_edits)),
+        FunctionTool(func=offload(list_directory)),
+        FunctionTool(func=offload(search_files)),
+        FunctionTool(func=offload(undo_turn)),
+        FunctionTool(func=offload(undo_session)),
         FunctionTool(func=print_affirming_message),
         FunctionTool(func=create_plan),
         FunctionTool(func=update_plan),
         FunctionTool(func=reset_plan),
-        FunctionTool(func=get_plan)
-    ]
+        FunctionTool(func=get_plan),
+        FunctionTool(func=governor.read_continuation)
+    ],
+    before_tool_callback=tool_timer.before_tool,
+    # metrics reads the latency the timer just recorded, and runs before the
+    # governor so it sees the untrimmed result size
+    after_tool_callback=[tool_timer.after_tool, metrics.after_tool, governor.after_tool],
+    # The governor measures the request after compaction has shrunk it
+    before_model_callback=[compactor.before_model, governor.before_model, metrics.before_model],
+    after_model_callback=metrics.after_model
 )
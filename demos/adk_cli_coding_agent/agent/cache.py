@@ -0,0 +1,145 @@
+"""Bounded in-memory cache of file contents shared by the coding agent tools.
+
+Entries are keyed by path and validated against (inode, mtime_ns, size) from a
+fresh stat, so a file changed on disk by anything else is re-read, while an
+unchanged file is served without reading it again.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachedFile:
+    """Cached contents of one file.
+
+    `info` is a memo for values derived from the data (hash, line count, ...)
+    so they are computed once per version of the file.
+    """
+
+    __slots__ = ('key', 'data', 'info')
+
+    def __init__(self, key: tuple, data: bytes):
+        self.key = key
+        self.data = data
+        self.info = {}
+
+
+def _stat_key(stat_result: os.stat_result) -> tuple:
+    return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+class FileCache:
+    """LRU cache of file contents with a total byte budget."""
+
+    def __init__(self, max_bytes: int = 64 << 20, max_file_bytes: int = 8 << 20, max_info_entries: int = 64):
+        """
+        Args:
+            max_bytes: Total size of cached contents before evicting (default: 64 MiB)
+            max_file_bytes: Files larger than this are never cached (default: 8 MiB)
+            max_info_entries: Number of files too large to cache whose derived
+                values are kept (default: 64)
+        """
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.max_info_entries = max_info_entries
+        self._entries: OrderedDict[Path, CachedFile] = OrderedDict()
+        # (stat key, info memo) for files too large to cache
+        self._info: OrderedDict[Path, tuple[tuple, dict]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: Path, stat_result: Optional[os.stat_result] = None) -> Optional[CachedFile]:
+        """Return the cached entry for a path if it still matches the file on disk."""
+        if stat_result is None:
+            stat_result = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.key == _stat_key(stat_result):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        logger.debug("File cache miss: %s", path)
+        return None
+
+    def put(self, path: Path, stat_result: os.stat_result, data: bytes) -> CachedFile:
+        """Cache the contents of a file as of the given stat result.
+
+        Files over the per-file limit are returned wrapped but not stored.
+        """
+        entry = CachedFile(_stat_key(stat_result), data)
+        if len(data) > self.max_file_bytes:
+            return entry
+
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._size -= len(previous.data)
+            self._entries[path] = entry
+            self._size += len(data)
+
+            while self._size > self.max_bytes:
+                evicted_path, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+                self.evictions += 1
+                logger.debug("File cache evicted %s (%d bytes)", evicted_path, len(evicted.data))
+        return entry
+
+    def info(self, path: Path, stat_result: os.stat_result) -> dict:
+        """Return the memo of derived values for a file too large to cache.
+
+        Like `CachedFile.info`, it is kept per version of the file, so hashing
+        or counting the lines of a large file happens once until it changes.
+        """
+        key = _stat_key(stat_result)
+        with self._lock:
+            entry = self._info.get(path)
+            if entry is None or entry[0] != key:
+                entry = self._info[path] = (key, {})
+                while len(self._info) > self.max_info_entries:
+                    self._info.popitem(last=False)
+            self._info.move_to_end(path)
+            return entry[1]
+
+    def read(self, path: Path) -> CachedFile:
+        """Return a file's contents, from the cache when unchanged."""
+        entry = self.get(path)
+        if entry is not None:
+            return entry
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            data = f.read()
+        return self.put(path, stat_result, data)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size
+            }
+
+    def log_stats(self) -> None:
+        """Log the counters at INFO level."""
+        stats = self.stats()
+        logger.info(
+            "File cache: %d hits, %d misses, %d evictions, %d entries, %d bytes",
+            stats["hits"], stats["misses"], stats["evictions"], stats["entries"], stats["bytes"]
+        )
+
+
+# Cache shared by all tools for the lifetime of the process
+file_cache = FileCache()
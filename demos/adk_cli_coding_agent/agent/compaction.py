@@ -0,0 +1,192 @@
+"""Context compaction for long coding agent sessions.
+
+Before each model call the request history is compacted:
+
+1. File reads that are superseded, because the same part of the file was read
+   again or the file was edited afterwards, are replaced with short stubs.
+2. If the history is still over budget, the oldest turns are replaced by a
+   summary prepended to the first turn that is kept.
+
+Only the outgoing request is changed; the session keeps the full history.
+`ContextCompactor.compact` is a pure function of the request contents, so it
+can be exercised offline against recorded events with a fake summarizer.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from typing import Callable, Optional
+
+from google.genai import types
+
+
+logger = logging.getLogger(__name__)
+
+READ_TOOLS = {"read_file"}
+WRITE_TOOLS = {"write_file", "update_file", "apply_edits", "undo_turn", "undo_session"}
+
+
+def estimate_tokens(contents: list[types.Content], chars_per_token: int = 4) -> int:
+    """Roughly estimate the tokens used by a list of contents."""
+    return sum(
+        math.ceil(len(content.model_dump_json(exclude_none=True)) / chars_per_token)
+        for content in contents
+    )
+
+
+def _is_user_message(content: types.Content) -> bool:
+    """True for contents typed by the user, as opposed to tool responses."""
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def summarize_turns(turns: list[list[types.Content]]) -> str:
+    """Default summarizer: each turn's request, the tools it used and its answer."""
+    lines = []
+    for turn in turns:
+        request = next((part.text for part in turn[0].parts or [] if part.text), "")
+        tools = []
+        answer = ""
+        for content in turn[1:]:
+            for part in content.parts or []:
+                if part.function_call:
+                    path = (part.function_call.args or {}).get("file_path")
+                    tools.append(f"{part.function_call.name}({path})" if path else part.function_call.name)
+                elif part.text and content.role == "model":
+                    answer = part.text
+        line = f"- User asked: {request[:200]}"
+        if tools:
+            line += f" | Tools: {', '.join(tools[:10])}"
+        if answer:
+            line += f" | Answer: {answer[:300]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class ContextCompactor:
+    """Shrinks the model request history; use `before_model` as a callback."""
+
+    def __init__(self, max_context_tokens: int = 100_000, keep_recent_turns: int = 6,
+                 summarize: Optional[Callable[[list[list[types.Content]]], str]] = None,
+                 chars_per_token: int = 4):
+        """
+        Args:
+            max_context_tokens: History size above which old turns are summarized
+            keep_recent_turns: Number of most recent user turns never summarized
+            summarize: Turns old turns into text; defaults to summarize_turns
+            chars_per_token: Characters per token used for estimates
+        """
+        self.max_context_tokens = max_context_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.summarize = summarize or summarize_turns
+        self.chars_per_token = chars_per_token
+        # Summaries by (session ID, number of turns summarized)
+        self._summaries: dict[tuple[str, int], str] = {}
+        # Per-call stats, by session ID
+        self.history: dict[str, list[dict]] = defaultdict(list)
+
+    def _stub_superseded_reads(self, contents: list[types.Content]) -> tuple[list[types.Content], int]:
+        """Replace file reads made obsolete by later reads or edits with stubs."""
+        # Walk backwards, remembering what later contents read or changed
+        later_reads: dict[str, list[tuple[str, int, int]]] = defaultdict(list)
+        later_edits: set[str] = set()
+        result = list(contents)
+        stubbed = 0
+
+        for index in range(len(contents) - 1, -1, -1):
+            content = contents[index]
+            parts = content.parts or []
+            new_parts = None
+            for part_index, part in enumerate(parts):
+                response = part.function_response
+                if not response or not isinstance(response.response, dict):
+                    continue
+                data = response.response
+                path = data.get("path")
+                if not data.get("success"):
+                    continue
+
+                if response.name in WRITE_TOOLS:
+                    # Undo tools report every file they restored
+                    later_edits.update(item["path"] for item in data.get("restored", []))
+                    if path:
+                        later_edits.add(path)
+                elif response.name in READ_TOOLS and path:
+                    unit, start, end = data.get("unit"), data.get("start"), data.get("end")
+                    covered = path in later_edits or any(
+                        later_unit == unit and later_start <= start and later_end >= end
+                        for later_unit, later_start, later_end in later_reads[path]
+                    )
+                    if covered:
+                        if new_parts is None:
+                            new_parts = list(parts)
+                        new_parts[part_index] = types.Part(function_response=types.FunctionResponse(
+                            id=response.id,
+                            name=response.name,
+                            response={
+                                "status": "superseded",
+                                "path": path,
+                                "message": "Earlier read omitted: this part of the file was read again or the file was edited later."
+                            }
+                        ))
+                        stubbed += 1
+                    elif unit:
+                        later_reads[path].append((unit, start, end))
+
+            if new_parts is not None:
+                result[index] = types.Content(role=content.role, parts=new_parts)
+        return result, stubbed
+
+    def _summarize_old_turns(self, contents: list[types.Content], session_id: str) -> tuple[list[types.Content], int]:
+        """Replace all but the most recent turns with a summary."""
+        turn_starts = [i for i, content in enumerate(contents) if _is_user_message(content)]
+        if len(turn_starts) <= self.keep_recent_turns:
+            return contents, 0
+
+        cut = turn_starts[-self.keep_recent_turns]
+        old = contents[:cut]
+        starts = [i for i in turn_starts if i < cut]
+        turns = [old[start:end] for start, end in zip(starts, starts[1:] + [cut])]
+
+        key = (session_id, len(turns))
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = self._summaries[key] = self.summarize(turns)
+
+        first = contents[cut]
+        merged = types.Content(role=first.role, parts=[
+            types.Part(text=f"[Summary of the earlier conversation]\n{summary}\n[End of summary]"),
+            *(first.parts or [])
+        ])
+        return [merged, *contents[cut + 1:]], len(turns)
+
+    def compact(self, contents: list[types.Content], session_id: str = "") -> tuple[list[types.Content], dict]:
+        """Compact request contents.
+
+        Returns:
+            The compacted contents and stats on what was saved
+        """
+        before = estimate_tokens(contents, self.chars_per_token)
+        compacted, stubbed = self._stub_superseded_reads(contents)
+        summarized = 0
+        if estimate_tokens(compacted, self.chars_per_token) > self.max_context_tokens:
+            compacted, summarized = self._summarize_old_turns(compacted, session_id)
+        after = estimate_tokens(compacted, self.chars_per_token)
+        return compacted, {
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": before - after,
+            "stubbed_reads": stubbed,
+            "summarized_turns": summarized
+        }
+
+    def before_model(self, callback_context, llm_request) -> None:
+        """before_model_callback that compacts the outgoing request in place."""
+        session_id = callback_context.session.id
+        llm_request.contents, stats = self.compact(llm_request.contents, session_id)
+        self.history[session_id].append(stats)
+        if stats["tokens_saved"]:
+            logger.info(
+                "Compacted context from ~%d to ~%d tokens (%d reads stubbed, %d turns summarized)",
+                stats["tokens_before"], stats["tokens_after"], stats["stubbed_reads"], stats["summarized_turns"]
+            )
+        return None
@@ -0,0 +1,101 @@
+"""Run blocking work off the event loop.
+
+ADK runs the function calls of one model turn concurrently, but a synchronous
+tool still executes on the event loop thread, so several file reads in one
+turn would run one after another. Wrapping a tool with `offload` turns it into
+a coroutine that runs the original function on a bounded thread pool.
+`ainput` does the same for reading the user's input in the CLI.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Shared by all offloaded tools; bounds how many blocking calls run at once
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="coding-agent-tool")
+
+
+def offload(func):
+    """Wrap a blocking function as a coroutine that runs it on the tool thread pool.
+
+    The wrapper keeps the function's name, docstring and signature, so ADK
+    builds the same tool declaration for it.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. tracing spans) into the worker thread
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(_executor, call)
+
+    return wrapper
+
+
+def _resolve(future: asyncio.Future, line: str | None, error: BaseException | None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(line)
+
+
+async def ainput(prompt: str = "") -> str:
+    """Read a line from stdin without blocking the event loop.
+
+    input() runs on a daemon thread, so cancelling the read (or exiting while
+    it is pending) never waits for the user. EOFError is raised as usual.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def read():
+        try:
+            line, error = input(prompt), None
+        except BaseException as e:
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(_resolve, future, line, error)
+        except RuntimeError:
+            # The event loop was closed while waiting for input
+            pass
+
+    threading.Thread(target=read, name="coding-agent-input", daemon=True).start()
+    return await future
+
+
+class ToolTimer:
+    """Measures the wall time of each tool call by its function call ID.
+
+    Use `before_tool` and `after_tool` as agent callbacks. The parallel
+    responses of one turn are merged into a single event, so timing them from
+    the event stream would give every call the same latency.
+    """
+
+    def __init__(self):
+        self._started: dict[str, float] = {}
+        self._latencies: dict[str, float] = {}
+
+    def before_tool(self, tool, args: dict, tool_context):
+        """before_tool_callback recording when a call starts."""
+        self._started[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    def after_tool(self, tool, args: dict, tool_context, tool_response):
+        """after_tool_callback recording how long a call took."""
+        started = self._started.pop(tool_context.function_call_id, None)
+        if started is not None:
+            self._latencies[tool_context.function_call_id] = time.perf_counter() - started
+        return None
+
+    def latency(self, function_call_id: str) -> float | None:
+        """Return the latency in seconds of a finished call, keeping it for `pop`."""
+        return self._latencies.get(function_call_id)
+
+    def pop(self, function_call_id: str) -> float | None:
+        """Return and forget the latency in seconds of a finished call."""
+        return self._latencies.pop(function_call_id, None)
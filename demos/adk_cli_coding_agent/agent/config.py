@@ -0,0 +1,4 @@
+"""Agent settings that are needed without importing ADK (e.g. for the CLI banner)."""
+
+AGENT_NAME = "coding_assistant"
+MODEL = "gemini-2.5-flash"
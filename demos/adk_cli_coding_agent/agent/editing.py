@@ -0,0 +1,233 @@
+"""Atomic file writes and in-memory text edits for the coding agent tools."""
+
+import difflib
+import hashlib
+import os
+import re
+import stat
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+# The process umask, which can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def content_hash(data) -> str:
+    """Return the SHA-256 hex digest of a bytes-like object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False) -> None:
+    """Replace a file's contents without ever exposing a partial write.
+
+    The data is written to a temporary file in the same directory, which is
+    then renamed over the target. Readers see either the old or the new file.
+
+    Args:
+        path: File to write
+        data: New contents
+        fsync: If True, flush the file and its directory to disk before returning
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        # Keep the permissions of the file being replaced; mkstemp creates
+        # files as 0600, so give new files the mode open() would
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    if fsync and hasattr(os, 'O_DIRECTORY'):
+        # Persist the rename itself
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def find_matches(content: str, old_text: str, start: int = 0, end: Optional[int] = None) -> list[int]:
+    """Return the offsets of all non-overlapping occurrences of old_text in one pass.
+
+    Only matches that begin in [start, end) are returned; a match may run
+    past end, so multi-line text starting on the last line of a range counts.
+    """
+    if end is None:
+        end = len(content)
+    offsets = []
+    if not old_text or start >= end:
+        return offsets
+    # A match beginning before end finishes within len(old_text) - 1 more characters
+    limit = end + len(old_text) - 1
+    position = content.find(old_text, start, limit)
+    while position != -1:
+        offsets.append(position)
+        position = content.find(old_text, position + len(old_text), limit)
+    return offsets
+
+
+def line_span(content: str, start_line: Optional[int], end_line: Optional[int]) -> tuple[int, int]:
+    """Convert a 1-based, inclusive line range to character offsets."""
+    start = 0
+    if start_line is not None and start_line > 1:
+        for _ in range(start_line - 1):
+            start = content.find('\n', start) + 1
+            if start == 0:
+                return len(content), len(content)
+
+    end = len(content)
+    if end_line is not None:
+        end = start
+        first = start_line if start_line is not None and start_line > 1 else 1
+        for _ in range(end_line - first + 1):
+            newline = content.find('\n', end)
+            if newline == -1:
+                return start, len(content)
+            end = newline + 1
+    return start, end
+
+
+def replace_text(content: str, old_text: str, new_text: str, occurrence: Optional[int] = None,
+                 start_line: Optional[int] = None, end_line: Optional[int] = None) -> tuple[str, int, int]:
+    """Replace occurrences of old_text, optionally only one or only within some lines.
+
+    Args:
+        content: Original text
+        old_text: Text to find
+        new_text: Replacement text
+        occurrence: If given, replace only this occurrence (1-based) within the scope
+        start_line: First line of the scope (1-based, inclusive)
+        end_line: Last line of the scope (1-based, inclusive); a match starting
+            on it may extend past it
+
+    Returns:
+        The edited text, the number of matches in scope, and the number replaced
+    """
+    scope_start, scope_end = line_span(content, start_line, end_line)
+    offsets = find_matches(content, old_text, scope_start, scope_end)
+    if occurrence is not None:
+        selected = offsets[occurrence - 1:occurrence] if occurrence >= 1 else []
+    else:
+        selected = offsets
+    if not selected:
+        return content, len(offsets), 0
+
+    pieces = []
+    previous = 0
+    for offset in selected:
+        pieces.append(content[previous:offset])
+        pieces.append(new_text)
+        previous = offset + len(old_text)
+    pieces.append(content[previous:])
+    return ''.join(pieces), len(offsets), len(selected)
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix of two strings, by binary search on slices."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff_hunks(old: str, new: str, path: str, context: int = 3, max_lines: int = 200) -> str:
+    """Return a unified diff of two versions of a file.
+
+    Only the region between the common prefix and suffix is handed to difflib,
+    so the cost depends on the size of the change rather than of the file.
+    """
+    prefix = _common_prefix_length(old, new)
+    suffix = _common_prefix_length(old[prefix:][::-1], new[prefix:][::-1])
+
+    # Widen the region to whole lines plus context
+    start = old.rfind('\n', 0, prefix) + 1
+    for _ in range(context):
+        if start == 0:
+            break
+        start = old.rfind('\n', 0, start - 1) + 1
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    for _ in range(context + 1):
+        newline = old.find('\n', old_end)
+        if newline == -1:
+            old_end, new_end = len(old), len(new)
+            break
+        new_end += newline + 1 - old_end
+        old_end = newline + 1
+
+    first_line = old.count('\n', 0, start)
+    lines = difflib.unified_diff(
+        old[start:old_end].splitlines(keepends=True),
+        new[start:new_end].splitlines(keepends=True),
+        fromfile=f"a/{path}",
+        tofile=f"b/{path}",
+        n=context
+    )
+
+    output = []
+    for line in lines:
+        if line.startswith('@@'):
+            # Shift hunk line numbers from the region back to the whole file
+            line = _HUNK_HEADER.sub(
+                lambda m: f"@@ -{int(m[1]) + first_line}{m[2] or ''} +{int(m[3]) + first_line}{m[4] or ''} @@",
+                line
+            )
+        if not line.endswith('\n'):
+            line += '\n\\ No newline at end of file\n'
+        output.append(line)
+        if len(output) >= max_lines:
+            output.append(f"... diff truncated at {max_lines} lines\n")
+            break
+    return ''.join(output)
+
+
+def apply_replacements(content: str, edits: list[dict]) -> tuple[str, list[tuple[int, int]]]:
+    """Apply a sequence of replacements to text in memory.
+
+    Each edit sees the result of the edits before it.
+
+    Args:
+        content: Original text
+        edits: Dicts with "old_text" and "new_text", and optionally
+            "occurrence", "start_line" and "end_line" as for replace_text
+
+    Returns:
+        The edited text and, for each edit, the number of matches in scope
+        and the number of replacements made
+    """
+    counts = []
+    for edit in edits:
+        content, matches, replaced = replace_text(
+            content,
+            edit["old_text"],
+            edit["new_text"],
+            occurrence=edit.get("occurrence"),
+            start_line=edit.get("start_line"),
+            end_line=edit.get("end_line")
+        )
+        counts.append((matches, replaced))
+    return content, counts
@@ -0,0 +1,271 @@
+"""Size limits for tool results sent back to the model.
+
+Every tool result becomes part of the session history and is resent to the
+model on each later turn, so oversized results are trimmed before they enter
+the context. The full result is kept in memory under a continuation handle
+that the model can page through with the read_continuation tool.
+"""
+
+import json
+import logging
+import math
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(value: Any, chars_per_token: int = 4) -> int:
+    """Roughly estimate how many tokens a JSON-serializable value costs."""
+    return math.ceil(len(_dumps(value)) / chars_per_token)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _fitting_prefix(text: str, max_chars: int) -> int:
+    """Length of the longest prefix of text whose JSON encoding fits in max_chars.
+
+    Quotes, backslashes and control characters grow when escaped, so the
+    prefix is found by binary search on the encoded length.
+    """
+    low, high = 0, min(len(text), max(max_chars - 2, 0))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(_dumps(text[:middle])) <= max_chars:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class ToolResultGovernor:
+    """Trims tool results to per-call and per-session token budgets.
+
+    Use `after_tool` as an agent's after_tool_callback, `before_model` as a
+    before_model_callback after context compaction, and register
+    `read_continuation` as a tool.
+    """
+
+    def __init__(self, max_call_tokens: int = 8000, max_session_tokens: int = 200_000,
+                 min_call_tokens: int = 500, chars_per_token: int = 4, max_stored: int = 32):
+        """
+        Args:
+            max_call_tokens: Largest result a single tool call may return
+            max_session_tokens: Tool-result tokens a session's context may hold;
+                once exceeded, each call is limited to min_call_tokens
+            min_call_tokens: Per-call budget once the session budget is spent
+            chars_per_token: Characters per token used for estimates
+            max_stored: Number of full results kept for continuation
+        """
+        self.max_call_tokens = max_call_tokens
+        self.max_session_tokens = max_session_tokens
+        self.min_call_tokens = min_call_tokens
+        self.chars_per_token = chars_per_token
+        self.max_stored = max_stored
+        self._stored: OrderedDict[str, dict] = OrderedDict()
+        # Estimated tokens of the tool results in each session's context
+        self._session_tokens: dict[str, int] = defaultdict(int)
+        self._tool_bytes: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def _call_budget(self, session_id: str) -> int:
+        """Token budget for the next call in a session."""
+        remaining = self.max_session_tokens - self._session_tokens[session_id]
+        return max(min(self.max_call_tokens, remaining), self.min_call_tokens)
+
+    def _store(self, handle: str, response: dict) -> None:
+        with self._lock:
+            self._stored[handle] = response
+            while len(self._stored) > self.max_stored:
+                self._stored.popitem(last=False)
+
+    def _shrink(self, response: dict, budget_chars: int) -> tuple[dict, list[dict]]:
+        """Trim the largest string, list and dict fields until the result fits.
+
+        A dict field is replaced by a prefix of its JSON text.
+        """
+        trimmed = dict(response)
+        fields = []
+        sizes = {key: len(_dumps(value)) for key, value in trimmed.items()}
+        excess = len(_dumps(trimmed)) - budget_chars
+
+        for key in sorted(sizes, key=sizes.get, reverse=True):
+            if excess <= 0:
+                break
+            value = trimmed[key]
+            if isinstance(value, dict):
+                value = _dumps(value)
+            if isinstance(value, str):
+                keep = _fitting_prefix(value, sizes[key] - excess - 64)
+                trimmed[key] = value[:keep]
+                fields.append({"field": key, "total_chars": len(value), "returned_chars": keep})
+            elif isinstance(value, list):
+                # Keep the longest prefix of items that fits
+                allowed = sizes[key] - excess
+                keep, used = 0, 2
+                for item in value:
+                    used += len(_dumps(item)) + 2
+                    if used > allowed:
+                        break
+                    keep += 1
+                trimmed[key] = value[:keep]
+                fields.append({"field": key, "total_items": len(value), "returned_items": keep})
+            else:
+                continue
+            excess -= sizes[key] - len(_dumps(trimmed[key]))
+        return trimmed, fields
+
+    def _truncate(self, response: dict, handle: str, budget_chars: int) -> dict:
+        """Trim a result to budget_chars of JSON, continuation note included, and store it.
+
+        Large fields are trimmed first. If that cannot make the result fit,
+        for instance because its size is spread over many small fields, the
+        result is replaced by a prefix of its JSON text in a "result" field.
+        """
+        reserve = len(_dumps({"continuation": self._continuation(handle, [])}))
+        trimmed, fields = self._shrink(response, budget_chars - reserve)
+        if fields:
+            # Make room for the notes on the trimmed fields
+            reserve += len(_dumps(fields))
+            trimmed, fields = self._shrink(response, budget_chars - reserve)
+        trimmed["continuation"] = self._continuation(handle, fields)
+        if fields and len(_dumps(trimmed)) <= budget_chars:
+            self._store(handle, response)
+            return trimmed
+
+        text = _dumps(response)
+        # The note's numbers are at most as long as len(text)
+        field = {"field": "result", "total_chars": len(text), "returned_chars": len(text)}
+        envelope = len(_dumps({"result": "", "continuation": self._continuation(handle, [field])}))
+        keep = _fitting_prefix(text, budget_chars - envelope + 2)
+        field["returned_chars"] = keep
+        self._store(handle, {"result": text})
+        return {"result": text[:keep], "continuation": self._continuation(handle, [field])}
+
+    @staticmethod
+    def _continuation(handle: str, fields: list[dict]) -> dict:
+        return {
+            "handle": handle,
+            "fields": fields,
+            "hint": "Result was truncated. Call read_continuation(handle, field, offset) for the rest."
+        }
+
+    def after_tool(self, tool, args: dict, tool_context, tool_response) -> Optional[dict]:
+        """after_tool_callback that trims oversized results and records usage."""
+        session_id = tool_context.session.id
+        response = tool_response if isinstance(tool_response, dict) else {"result": tool_response}
+        budget = self._call_budget(session_id)
+        tokens = estimate_tokens(response, self.chars_per_token)
+
+        replaced = None
+        if tokens > budget and tool.name != "read_continuation":
+            handle = uuid.uuid4().hex[:12]
+            trimmed = self._truncate(response, handle, budget * self.chars_per_token)
+            replaced = response = trimmed
+            logger.info("Truncated %s result from ~%d to ~%d tokens (handle %s)",
+                        tool.name, tokens, estimate_tokens(trimmed, self.chars_per_token), handle)
+
+        added = len(_dumps(response).encode('utf-8'))
+        with self._lock:
+            self._session_tokens[session_id] += math.ceil(added / self.chars_per_token)
+            self._tool_bytes[session_id][tool.name] += added
+        logger.debug("%s added %d bytes to context (session total ~%d tokens)",
+                     tool.name, added, self._session_tokens[session_id])
+        return replaced
+
+    def before_model(self, callback_context, llm_request) -> None:
+        """before_model_callback measuring the tool results the request still holds.
+
+        Results that compaction has stubbed out or summarized no longer count
+        against the session budget. Results added before the next model call
+        are counted by after_tool.
+        """
+        tokens = 0
+        for content in llm_request.contents:
+            for part in content.parts or ():
+                if part.function_response is not None:
+                    tokens += estimate_tokens(part.function_response.response, self.chars_per_token)
+        with self._lock:
+            self._session_tokens[callback_context.session.id] = tokens
+        return None
+
+    def read_continuation(self, handle: str, field: str, offset: int = 0) -> dict:
+        """Read more of a tool result that was truncated to save context.
+
+        Args:
+            handle: The continuation handle from the truncated result
+            field: The truncated field to read (e.g., "content" or "files")
+            offset: Item index (for lists) or character offset (for text, and for other
+                values, which are read as JSON text) to start from
+
+        Returns:
+            The next part of the field, with the offset to continue from
+        """
+        with self._lock:
+            response = self._stored.get(handle)
+        if response is None:
+            return {
+                "error": "unknown_handle",
+                "message": f"No stored result for handle {handle}; it may have expired. Re-run the original tool call.",
+                "handle": handle
+            }
+        if field not in response:
+            return {
+                "error": "unknown_field",
+                "message": f"Field {field} not in stored result. Available: {', '.join(response)}",
+                "handle": handle
+            }
+
+        value = response[field]
+        if not isinstance(value, (str, list)):
+            # Other values are paged through as JSON text, as _shrink trims them
+            value = _dumps(value)
+        total = len(value)
+        # The rest of the page, with an empty value, counts against the budget
+        envelope = {
+            "success": True, "handle": handle, "field": field, "offset": offset,
+            "value": "", "next_offset": total, "has_more": True
+        }
+        budget_chars = self.max_call_tokens * self.chars_per_token - len(_dumps(envelope))
+        if isinstance(value, str):
+            window = value[offset:offset + budget_chars]
+            part = window[:_fitting_prefix(window, budget_chars + 2)]
+            next_offset = offset + len(part)
+        else:
+            part, used = [], 0
+            for item in value[offset:]:
+                used += len(_dumps(item)) + 2
+                if part and used > budget_chars:
+                    break
+                part.append(item)
+            next_offset = offset + len(part)
+
+        return {
+            "success": True,
+            "handle": handle,
+            "field": field,
+            "offset": offset,
+            "value": part,
+            "next_offset": next_offset,
+            "has_more": next_offset < total
+        }
+
+    def usage(self, session_id: str) -> dict:
+        """Return the tool-result tokens in a session's context and the bytes each tool added."""
+        with self._lock:
+            return {
+                "estimated_tokens": self._session_tokens[session_id],
+                "bytes_by_tool": dict(self._tool_bytes[session_id])
+            }
+
+    def log_usage(self, session_id: str) -> None:
+        """Log a session's per-tool context usage at INFO level."""
+        usage = self.usage(session_id)
+        by_tool = ", ".join(f"{name}={size}" for name, size in sorted(usage["bytes_by_tool"].items()))
+        logger.info("Tool results hold ~%d tokens of context (bytes added by tool: %s)",
+                    usage["estimated_tokens"], by_tool or "none")
@@ -0,0 +1,187 @@
+"""Undo journal for the coding agent's file writes.
+
+After a tool changes a file, the file's previous contents are saved as a
+zlib-compressed blob named by its SHA-256, so identical contents are stored
+once. A manifest row per (session, turn, path) records the hash before the
+turn's first write and after its last one. Undoing a turn restores only the
+files in its manifest.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Collection, Optional
+
+from coding_agent import editing
+
+
+# Journal directory, relative to the working directory
+JOURNAL_DIR = ".coding_agent/journal"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    turn_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    -- NULL when the file did not exist before the turn
+    before_hash TEXT,
+    after_hash TEXT,
+    timestamp REAL NOT NULL,
+    undone INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (session_id, turn_id, path)
+);
+CREATE INDEX IF NOT EXISTS changes_by_session ON changes (session_id, undone, id);
+"""
+
+
+class Journal:
+    """Content-addressed store of file versions plus per-turn manifests."""
+
+    def __init__(self, root: str | Path = JOURNAL_DIR, level: int = 6):
+        """
+        Args:
+            root: Directory holding the blobs and manifest database; opened on first use
+            level: zlib compression level for blobs
+        """
+        self.root = Path(root)
+        self.level = level
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.root = self.root.resolve()
+            (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.root / "journal.sqlite", check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest[2:]
+
+    def put_blob(self, data: bytes, digest: Optional[str] = None) -> str:
+        """Store contents if not already stored and return their hash."""
+        digest = digest or editing.content_hash(data)
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            editing.atomic_write(path, zlib.compress(data, self.level))
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        """Return the contents stored under a hash."""
+        return zlib.decompress(self._blob_path(digest).read_bytes())
+
+    def record_write(self, session_id: str, turn_id: str, path: Path, before: Optional[bytes],
+                     before_digest: Optional[str], after_digest: str) -> None:
+        """Record a successful write; a turn's first write per path keeps the contents from before it.
+
+        Called only once the write has succeeded, so a failed write leaves no
+        manifest row behind.
+
+        Args:
+            session_id: Session making the write
+            turn_id: Turn (invocation) making the write
+            path: Absolute path of the file
+            before: Contents before the write, or None if the file did not exist
+            before_digest: Hash of before, if already known
+            after_digest: Hash of the contents written
+        """
+        with self._lock, self.db:
+            updated = self.db.execute(
+                "UPDATE changes SET after_hash = ? WHERE session_id = ? AND turn_id = ? AND path = ?",
+                (after_digest, session_id, turn_id, str(path))
+            ).rowcount
+            if updated:
+                return
+            before_hash = self.put_blob(before, before_digest) if before is not None else None
+            self.db.execute(
+                "INSERT INTO changes (session_id, turn_id, path, before_hash, after_hash, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, turn_id, str(path), before_hash, after_digest, time.time())
+            )
+
+    def last_turn(self, session_id: str) -> Optional[str]:
+        """Return the most recent turn of a session with changes not yet undone."""
+        row = self.db.execute(
+            "SELECT turn_id FROM changes WHERE session_id = ? AND undone = 0 ORDER BY id DESC LIMIT 1",
+            (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _changes(self, session_id: str, turn_id: Optional[str]) -> list[tuple[list[int], str, Optional[str], Optional[str]]]:
+        """Pending changes per path: the earliest before-hash and the latest after-hash."""
+        query = "SELECT id, path, before_hash, after_hash FROM changes WHERE session_id = ? AND undone = 0"
+        params = [session_id]
+        if turn_id is not None:
+            query += " AND turn_id = ?"
+            params.append(turn_id)
+
+        by_path: dict[str, list] = {}
+        for row_id, path, before, after in self.db.execute(query + " ORDER BY id", params):
+            if path in by_path:
+                by_path[path][0].append(row_id)
+                by_path[path][2] = after
+            else:
+                by_path[path] = [[row_id], before, after]
+        return [(ids, path, before, after) for path, (ids, before, after) in by_path.items()]
+
+    def pending_paths(self, session_id: str, turn_id: Optional[str] = None) -> list[str]:
+        """Return the files with changes not yet undone, in one turn or the whole session."""
+        with self._lock:
+            return [path for _, path, _, _ in self._changes(session_id, turn_id)]
+
+    def undo(self, session_id: str, turn_id: Optional[str] = None, force: bool = False,
+             paths: Optional[Collection[str]] = None) -> dict:
+        """Restore the files changed by one turn, or by a whole session.
+
+        A file that changed again after the journaled write is a conflict; no
+        file is restored if there are conflicts unless force is True.
+
+        Args:
+            session_id: Session whose changes to undo
+            turn_id: Turn to undo, or None for every pending change in the session
+            force: If True, restore files even if they changed since
+            paths: If given, only undo changes to these files
+
+        Returns:
+            The restored and conflicting files
+        """
+        with self._lock:
+            changes = self._changes(session_id, turn_id)
+            if paths is not None:
+                changes = [change for change in changes if change[1] in paths]
+            conflicts = []
+            for _, path, _, after in changes:
+                try:
+                    current = editing.content_hash(Path(path).read_bytes())
+                except FileNotFoundError:
+                    current = None
+                if current != after:
+                    conflicts.append({"path": path, "expected_sha256": after, "found_sha256": current})
+            if conflicts and not force:
+                return {"restored": [], "conflicts": conflicts}
+
+            restored = []
+            for ids, path, before, _ in changes:
+                target = Path(path)
+                if before is None:
+                    target.unlink(missing_ok=True)
+                    restored.append({"path": path, "action": "deleted"})
+                else:
+                    data = self.get_blob(before)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    editing.atomic_write(target, data)
+                    restored.append({"path": path, "action": "restored", "sha256": before})
+                with self.db:
+                    self.db.executemany("UPDATE changes SET undone = 1 WHERE id = ?", [(i,) for i in ids])
+            return {"restored": restored, "conflicts": conflicts}
+
+
+# Journal shared by all tools for the lifetime of the process
+journal = Journal()
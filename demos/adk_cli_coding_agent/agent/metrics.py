@@ -0,0 +1,208 @@
+"""Per-turn latency and token metrics for the coding agent.
+
+`TurnMetrics` collects model timings through agent callbacks and takes tool
+timings from the agent's `ToolTimer`. The CLI
+brackets each turn with `start_turn` and `end_turn`; each finished turn is
+appended as one JSON line to a trace file and kept in memory for `summary`.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Optional
+
+from coding_agent.concurrency import ToolTimer
+
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values, or None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class TurnMetrics:
+    """Records model latency, tokens and tool timings for each turn.
+
+    Use `before_model`/`after_model` as model callbacks and `after_tool` as a
+    tool callback placed after the timer's own `after_tool`.
+    """
+
+    def __init__(self, timer: ToolTimer, trace_path: Optional[str | Path] = None, max_turns: int = 1000):
+        """
+        Args:
+            timer: The ToolTimer the agent's tool calls are timed with
+            trace_path: JSONL file each finished turn is appended to, or None to keep
+                records in memory only
+            max_turns: Number of recent turns kept in memory for summaries
+        """
+        self.timer = timer
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.records: deque[dict] = deque(maxlen=max_turns)
+        self._turns: dict[str, dict] = {}
+        self._model_calls: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def start_turn(self, session_id: str) -> None:
+        """Begin collecting a turn for a session."""
+        with self._lock:
+            self._turns[session_id] = {
+                "started": time.time(),
+                "model_calls": [],
+                "tools": defaultdict(lambda: {"calls": 0, "wall_s": 0.0, "result_bytes": 0, "latencies": []}),
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached_tokens": 0
+            }
+
+    def before_model(self, callback_context, llm_request) -> None:
+        """before_model_callback recording when a model call starts."""
+        self._model_calls[callback_context.session.id] = {
+            "started": time.perf_counter(),
+            "first_response": None,
+            "finished": None,
+            "request_bytes": sum(
+                len(content.model_dump_json(exclude_none=True)) for content in llm_request.contents
+            )
+        }
+        return None
+
+    def after_model(self, callback_context, llm_response) -> None:
+        """after_model_callback recording model timings and token usage.
+
+        Called for every streamed chunk; only complete responses carry usage.
+        """
+        session_id = callback_context.session.id
+        call = self._model_calls.get(session_id)
+        turn = self._turns.get(session_id)
+        if call is None or turn is None:
+            return None
+
+        now = time.perf_counter()
+        if call["first_response"] is None:
+            call["first_response"] = now
+            turn["model_calls"].append(call)
+        call["finished"] = now
+
+        usage = llm_response.usage_metadata
+        if usage and not llm_response.partial:
+            turn["input_tokens"] += usage.prompt_token_count or 0
+            turn["output_tokens"] += (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+            turn["cached_tokens"] += usage.cached_content_token_count or 0
+        return None
+
+    def after_tool(self, tool, args: dict, tool_context, tool_response) -> None:
+        """after_tool_callback recording a tool call's wall time and result size."""
+        wall = self.timer.latency(tool_context.function_call_id)
+        turn = self._turns.get(tool_context.session.id)
+        if wall is None or turn is None:
+            return None
+
+        size = len(json.dumps(tool_response, ensure_ascii=False, default=str).encode('utf-8'))
+        with self._lock:
+            stats = turn["tools"][tool.name]
+            stats["calls"] += 1
+            stats["wall_s"] += wall
+            stats["result_bytes"] += size
+            stats["latencies"].append(wall)
+        return None
+
+    def end_turn(self, session_id: str, latency: float, first_token: Optional[float],
+                 interrupted: bool = False) -> Optional[dict]:
+        """Finish a turn, append its record to the trace and return it.
+
+        Args:
+            session_id: The session the turn ran in
+            latency: Seconds from sending the message to the end of the turn
+            first_token: Seconds until the first model output, if any arrived
+            interrupted: True if the turn was cancelled
+        """
+        with self._lock:
+            turn = self._turns.pop(session_id, None)
+        self._model_calls.pop(session_id, None)
+        if turn is None:
+            return None
+
+        model_latencies = [call["finished"] - call["started"] for call in turn["model_calls"]]
+        record = {
+            "timestamp": turn["started"],
+            "session_id": session_id,
+            "latency_s": round(latency, 4),
+            "first_token_s": round(first_token, 4) if first_token is not None else None,
+            "interrupted": interrupted,
+            "model_calls": len(model_latencies),
+            "model_latency_s": round(sum(model_latencies), 4),
+            "model_first_response_s": [
+                round(call["first_response"] - call["started"], 4) for call in turn["model_calls"]
+            ],
+            "request_bytes": [call["request_bytes"] for call in turn["model_calls"]],
+            "input_tokens": turn["input_tokens"],
+            "output_tokens": turn["output_tokens"],
+            "cached_tokens": turn["cached_tokens"],
+            "tools": {
+                name: {
+                    "calls": stats["calls"],
+                    "wall_s": round(stats["wall_s"], 4),
+                    "max_s": round(max(stats["latencies"]), 4),
+                    "result_bytes": stats["result_bytes"]
+                }
+                for name, stats in turn["tools"].items()
+            },
+            "tool_latencies": {
+                name: [round(value, 4) for value in stats["latencies"]]
+                for name, stats in turn["tools"].items()
+            }
+        }
+        self.records.append(record)
+
+        if self.trace_path:
+            try:
+                self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.trace_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.warning("Could not write metrics trace %s: %s", self.trace_path, e)
+        return record
+
+    def summary(self) -> dict[str, Any]:
+        """p50/p95 of the recorded turns, overall and per tool."""
+        records = list(self.records)
+        fields = {
+            "turn latency (s)": [r["latency_s"] for r in records],
+            "first token (s)": [r["first_token_s"] for r in records if r["first_token_s"] is not None],
+            "model latency (s)": [r["model_latency_s"] for r in records],
+            "input tokens": [r["input_tokens"] for r in records],
+            "output tokens": [r["output_tokens"] for r in records],
+        }
+        tool_latencies = defaultdict(list)
+        tool_bytes = defaultdict(int)
+        for record in records:
+            for name, latencies in record["tool_latencies"].items():
+                tool_latencies[name].extend(latencies)
+                tool_bytes[name] += record["tools"][name]["result_bytes"]
+
+        return {
+            "turns": len(records),
+            "metrics": {
+                name: {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+                for name, values in fields.items()
+            },
+            "tools": {
+                name: {
+                    "calls": len(latencies),
+                    "p50": percentile(latencies, 50),
+                    "p95": percentile(latencies, 95),
+                    "result_bytes": tool_bytes[name]
+                }
+                for name, latencies in sorted(tool_latencies.items())
+            }
+        }
@@ -0,0 +1,327 @@
+"""Terminal rendering for the coding agent CLI.
+
+Output for an event is collected into a frame and written to the terminal
+with a single write when the frame is flushed, instead of one print() per
+line. Streamed response text is the exception: each chunk is written as it
+arrives. Plan updates redraw only the tasks that changed, and verbose tool
+results are truncated before being formatted as JSON.
+"""
+
+import copy
+import json
+import os
+import sys
+from typing import Any, TextIO
+
+
+class Colors:
+    """ANSI color codes for terminal formatting."""
+
+    # Text colors
+    RED = '\033[91m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    MAGENTA = '\033[95m'
+    CYAN = '\033[96m'
+    WHITE = '\033[97m'
+    GRAY = '\033[90m'
+
+    # Styles
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+
+    # Reset
+    RESET = '\033[0m'
+
+    @classmethod
+    def color(cls, text: str, color: str, bold: bool = False) -> str:
+        """Apply color to text."""
+        style = cls.BOLD if bold else ''
+        return f"{style}{color}{text}{cls.RESET}"
+
+
+class NoColors(Colors):
+    """Empty color codes, for pipes and --no-color."""
+
+    RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = GRAY = ''
+    BOLD = UNDERLINE = RESET = ''
+
+
+def use_color(stream: TextIO = sys.stdout) -> bool:
+    """True if the stream is a terminal and NO_COLOR is not set."""
+    return stream.isatty() and not os.environ.get("NO_COLOR")
+
+
+def truncate_arg(value: Any, max_len: int = 20) -> str:
+    """Truncate argument value if too long."""
+    str_value = str(value)
+    if len(str_value) > max_len:
+        return f"{str_value[:max_len]}..."
+    return str_value
+
+
+def _preview(value: Any, max_chars: int, max_items: int) -> Any:
+    """Copy of a JSON value with long strings and lists cut short.
+
+    Only the parts that will be shown are visited, so a huge tool result
+    costs about as much as a small one.
+    """
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}... ({len(value) - max_chars} more chars)"
+        return value
+    if isinstance(value, dict):
+        items = list(value.items())
+        shown = {key: _preview(item, max_chars, max_items) for key, item in items[:max_items]}
+        if len(items) > max_items:
+            shown["..."] = f"{len(items) - max_items} more keys"
+        return shown
+    if isinstance(value, (list, tuple)):
+        shown = [_preview(item, max_chars, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            shown.append(f"... {len(value) - max_items} more items")
+        return shown
+    return value
+
+
+class Renderer:
+    """Buffers CLI output into frames written with one call each."""
+
+    def __init__(self, stream: TextIO = sys.stdout, color: bool = True,
+                 max_json_chars: int = 500, max_json_items: int = 20, max_json_lines: int = 80):
+        """
+        Args:
+            stream: Where output is written
+            color: If False, no ANSI codes are emitted at all
+            max_json_chars: Longest string shown in a verbose tool result
+            max_json_items: Most list items or keys shown per level in a verbose tool result
+            max_json_lines: Most lines shown for one verbose tool result
+        """
+        self.stream = stream
+        self.colors = Colors if color else NoColors
+        self.max_json_chars = max_json_chars
+        self.max_json_items = max_json_items
+        self.max_json_lines = max_json_lines
+        self._frame: list[str] = []
+        # Last plan rendered, kept up to date from plan update deltas
+        self._plan: dict | None = None
+        # Task IDs changed by deltas since the plan was last drawn
+        self._changed_tasks: set[int] = set()
+        # True while streamed response text is being written
+        self._streaming = False
+
+    def write(self, text: str = '') -> None:
+        """Add a line to the current frame."""
+        self._frame.append(text)
+
+    def flush(self) -> None:
+        """Write the current frame to the stream."""
+        if self._changed_tasks:
+            self._render_plan_changes()
+        if self._frame:
+            self.end_text()
+            self._frame.append('')
+            self.stream.write('\n'.join(self._frame))
+            self.stream.flush()
+            self._frame = []
+
+    def header(self, text: str) -> None:
+        """Add a header."""
+        c = self.colors
+        self.write(f"\n{c.BOLD}{c.CYAN}{'='*60}{c.RESET}")
+        self.write(f"{c.BOLD}{c.CYAN}{text.center(60)}{c.RESET}")
+        self.write(f"{c.BOLD}{c.CYAN}{'='*60}{c.RESET}\n")
+
+    def section(self, title: str) -> None:
+        """Add a section divider."""
+        c = self.colors
+        self.write(f"\n{c.BOLD}{c.BLUE}▶ {title}{c.RESET}")
+        self.write(f"{c.GRAY}{'─'*60}{c.RESET}")
+
+    def event(self, event_type: str, author: str | None = None) -> None:
+        """Add event metadata."""
+        c = self.colors
+        icon_map = {
+            'ModelTurn': '🤖',
+            'ToolUse': '🔧',
+            'ToolResult': '✅',
+            'Error': '❌',
+            'TurnComplete': '✨'
+        }
+        icon = icon_map.get(event_type, '📨')
+
+        event_color = c.YELLOW if 'Tool' in event_type else c.CYAN
+        line = f"\n{icon} {c.color(event_type, event_color, bold=True)}"
+        if author:
+            line += f" {c.GRAY}[{author}]{c.RESET}"
+        self.write(line)
+
+    def text(self, text: str) -> None:
+        """Add assistant text, indented for readability."""
+        c = self.colors
+        self.write(f"{c.GREEN}💬 Response:{c.RESET}")
+        self.write("   " + text.replace('\n', '\n   '))
+
+    def text_delta(self, text: str) -> None:
+        """Write a chunk of streamed assistant text straight to the stream."""
+        if not self._streaming:
+            c = self.colors
+            self.flush()
+            self.stream.write(f"{c.GREEN}💬 Response:{c.RESET}\n   ")
+            self._streaming = True
+        self.stream.write(text.replace('\n', '\n   '))
+        self.stream.flush()
+
+    def end_text(self) -> None:
+        """End the line of streamed text, if any."""
+        if self._streaming:
+            self.stream.write('\n')
+            self._streaming = False
+
+    def tool_call(self, name: str, args: dict) -> None:
+        """Add tool call information in concise function-call format."""
+        c = self.colors
+        args_display = ", ".join(f"{k}={truncate_arg(v)}" for k, v in (args or {}).items())
+        self.write(f"{c.MAGENTA}🔧 {c.BOLD}{name}({args_display}){c.RESET}")
+
+    def _progress(self, plan: dict) -> str:
+        c = self.colors
+        completed_count = plan["completed_count"]
+        total_count = len(plan["tasks"])
+        progress_pct = (completed_count / total_count * 100) if total_count > 0 else 0
+        bar_width = 40
+        filled = int(bar_width * completed_count / total_count) if total_count > 0 else 0
+        bar = '█' * filled + '░' * (bar_width - filled)
+        return f"{c.GRAY}Progress: [{c.GREEN}{bar}{c.GRAY}] {completed_count}/{total_count} ({progress_pct:.0f}%){c.RESET}"
+
+    def _task_line(self, task: dict) -> str:
+        c = self.colors
+        if task["completed"]:
+            # Use dim/gray text for completed tasks
+            return f"{c.GREEN}  ✓ [{task['id']}] {c.GRAY}{task['description']}{c.RESET}"
+        return f"{c.YELLOW}  ○ [{task['id']}] {c.WHITE}{task['description']}{c.RESET}"
+
+    def plan(self, plan: dict) -> None:
+        """Add a full plan with its progress bar and tasks."""
+        c = self.colors
+        self._plan = copy.deepcopy(plan)
+        self._changed_tasks.clear()
+
+        self.write(f"\n{c.BOLD}{c.CYAN}{'='*60}{c.RESET}")
+        self.write(f"{c.BOLD}{c.CYAN}📋 PLAN: {plan['title']}{c.RESET}")
+        self.write(f"{c.BOLD}{c.CYAN}{'='*60}{c.RESET}\n")
+        self.write(self._progress(plan) + "\n")
+        for task in plan["tasks"]:
+            self.write(self._task_line(task))
+        self.write(f"\n{c.GRAY}{'─'*60}{c.RESET}\n")
+
+    def plan_delta(self, delta: dict) -> None:
+        """Apply a plan update; changed tasks are drawn when the frame is flushed."""
+        if not self._plan:
+            return
+        task = self._plan["tasks"][delta["task_id"]]
+        if task["completed"] != delta["completed"]:
+            task["completed"] = delta["completed"]
+            self._plan["completed_count"] += 1 if delta["completed"] else -1
+            self._changed_tasks.add(task["id"])
+
+    def _render_plan_changes(self) -> None:
+        """Draw only the tasks changed since the last frame, plus progress."""
+        c = self.colors
+        self.write(f"{c.CYAN}📋 {self._plan['title']}{c.RESET}")
+        for task_id in sorted(self._changed_tasks):
+            self.write(self._task_line(self._plan["tasks"][task_id]))
+        self.write(self._progress(self._plan) + "\n")
+        self._changed_tasks.clear()
+
+    def _json(self, value: Any) -> None:
+        preview = _preview(value, self.max_json_chars, self.max_json_items)
+        lines = json.dumps(preview, indent=4, default=str).split('\n')
+        if len(lines) > self.max_json_lines:
+            hidden = len(lines) - self.max_json_lines
+            lines = lines[:self.max_json_lines] + [f"... ({hidden} more lines)"]
+        self.write("      " + "\n      ".join(lines))
+
+    def latency(self, latency: float | None) -> str:
+        """Format a tool latency in seconds for display."""
+        if latency is None:
+            return ''
+        c = self.colors
+        return f" {c.GRAY}({latency * 1000:.0f} ms){c.RESET}"
+
+    def tool_response(self, name: str, response: Any, verbose: bool = False, latency: float | None = None) -> None:
+        """Add tool response information.
+
+        Args:
+            name: Tool name
+            response: Tool response
+            verbose: If True, show the (truncated) response. If False, show checkmark/error only.
+            latency: Seconds the tool call took, if known
+        """
+        c = self.colors
+
+        # Plans are always rendered visually
+        if isinstance(response, dict) and response.get("plan"):
+            self.plan(response["plan"])
+            return
+
+        # Plan updates only carry the change
+        if isinstance(response, dict) and "delta" in response and self._plan:
+            self.plan_delta(response["delta"])
+            return
+
+        if isinstance(response, dict) and response.get("status") == "plan_reset":
+            self._plan = None
+            self._changed_tasks.clear()
+
+        if verbose:
+            self.write(f"{c.GREEN}✅ {c.BOLD}{name}{c.RESET}{self.latency(latency)}")
+            if isinstance(response, (dict, list)):
+                self.write(f"{c.GRAY}   Result:{c.RESET}")
+                self._json(response)
+            else:
+                self.write(f"{c.GRAY}   Result:{c.RESET} {response}")
+        elif isinstance(response, dict) and 'error' in response:
+            # Concise mode: just show success/failure
+            self.write(f"{c.RED}✗ {name} failed{c.RESET}{self.latency(latency)}")
+        else:
+            self.write(f"{c.GREEN}✓ {name}{c.RESET}{self.latency(latency)}")
+
+    def error(self, message: str) -> None:
+        """Add an error message."""
+        c = self.colors
+        self.write(f"{c.RED}❌ ERROR:{c.RESET} {message}")
+
+    def turn_stats(self, first_token: float | None, total: float) -> None:
+        """Add the time to first token and total time of a turn, in seconds."""
+        c = self.colors
+        first = f"first token {first_token * 1000:.0f} ms, " if first_token is not None else ""
+        self.write(f"{c.GRAY}({first}turn {total:.1f} s){c.RESET}")
+
+    def stats(self, summary: dict) -> None:
+        """Add a table of turn metric percentiles from TurnMetrics.summary()."""
+        c = self.colors
+        if not summary["turns"]:
+            self.write(f"{c.GRAY}No turns recorded yet{c.RESET}\n")
+            return
+
+        def fmt(value):
+            if value is None:
+                return "-"
+            return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+        self.write(f"{c.BOLD}{c.CYAN}📈 Stats over {summary['turns']} turns{c.RESET}")
+        self.write(f"{c.GRAY}{'':<22}{'p50':>10}{'p95':>10}{c.RESET}")
+        for name, values in summary["metrics"].items():
+            self.write(f"  {name:<20}{fmt(values['p50']):>10}{fmt(values['p95']):>10}")
+        if summary["tools"]:
+            self.write(f"{c.GRAY}{'tool wall time (s)':<22}{'p50':>10}{'p95':>10}{'calls':>8}{'bytes':>12}{c.RESET}")
+            for name, values in summary["tools"].items():
+                self.write(f"  {name:<20}{fmt(values['p50']):>10}{fmt(values['p95']):>10}"
+                           f"{values['calls']:>8}{values['result_bytes']:>12}")
+        self.write()
+
+    def finish(self, reason: str) -> None:
+        """Add turn completion spacing."""
+        self.write()
@@ -0,0 +1,597 @@
+"""Persistent trigram index and parallel regex search for the coding agent.
+
+One index covers the workspace (the working directory the agent runs in) and
+lives in a small SQLite database under it. Each indexed file contributes the
+set of trigrams of its case-folded text, so a query only has to run its regex
+over files containing every trigram of the literal text the pattern requires.
+Before every search, the part of the index under the searched directory is
+updated from directory mtimes: only directories whose entries changed are
+listed again, so an unchanged tree costs one stat per directory. A full
+refresh, which compares every file's mtime and size, runs in the background
+while the CLI waits for input and catches files rewritten in place. Ignored
+paths are skipped.
+Directories outside the workspace, and workspaces where the index cannot be
+written, are searched with a plain scan instead.
+"""
+
+import fnmatch
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from coding_agent import walk
+from coding_agent.cache import file_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Directory (relative to the workspace) holding the index database;
+# walk.IGNORED_DIRS keeps it out of the index
+INDEX_DIR = ".coding_agent"
+INDEX_FILE = "search_index.sqlite"
+
+# Bumped when the way trigrams are computed changes; older indexes are rebuilt
+INDEX_VERSION = 2
+
+# Files larger than this are not indexed; they are always regex-scanned instead
+MAX_INDEXED_BYTES = 1 << 20
+
+# Below this many candidate files the regex runs in-process
+PARALLEL_THRESHOLD = 64
+
+# Files per task when fanning out to the process pool
+BATCH_SIZE = 256
+
+# Values of the "indexed" column
+_INDEXED = 1
+_TOO_LARGE = 0
+_BINARY = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    indexed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use.
+
+    Workers come from a fork server rather than being forked from this
+    process: a worker forked while the CLI's input thread is blocked in
+    input() inherits the held stdin lock and hangs while starting up.
+    """
+    global _pool
+    if _pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+        _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def _fold(data: bytes) -> bytes:
+    """Case-fold UTF-8 text so that text a case-insensitive regex matches folds alike.
+
+    re.IGNORECASE also equates dotted and dotless I with i, which casefold()
+    alone does not.
+    """
+    if data.isascii():
+        return data.lower()
+    text = data.decode('utf-8', errors='replace').casefold()
+    return text.replace('\u0131', 'i').replace('\u0307', '').encode('utf-8')
+
+
+def _trigrams(data: bytes) -> list[int]:
+    """Return the distinct byte trigrams of case-folded text, packed as ints."""
+    data = _fold(data)
+    # Slicing then deduplicating is cheaper than packing every position
+    distinct = {data[i:i + 3] for i in range(len(data) - 2)}
+    return [int.from_bytes(trigram, 'big') for trigram in distinct]
+
+
+def _index_files(root: str, paths: list[str]) -> list[tuple[str, int, list[int]]]:
+    """Read and trigram a batch of files. Runs in a worker process."""
+    results = []
+    for rel_path in paths:
+        try:
+            with open(os.path.join(root, rel_path), 'rb') as f:
+                data = f.read(MAX_INDEXED_BYTES + 1)
+        except OSError:
+            continue
+        if b'\x00' in data[:8192]:
+            results.append((rel_path, _BINARY, []))
+        elif len(data) > MAX_INDEXED_BYTES:
+            results.append((rel_path, _TOO_LARGE, []))
+        else:
+            results.append((rel_path, _INDEXED, _trigrams(data)))
+    return results
+
+
+def _grep_files(root: str, paths: list[str], pattern: str, flags: int, max_matches: int,
+                read: Optional[Callable[[Path], bytes]] = None) -> list[dict]:
+    """Run a regex over a batch of files. Runs in a worker process.
+
+    Args:
+        read: Optional function returning a file's bytes, used instead of
+            reading from disk when running in-process
+    """
+    regex = re.compile(pattern, flags)
+    matches = []
+    for rel_path in paths:
+        full_path = Path(root, rel_path)
+        try:
+            data = read(full_path) if read else full_path.read_bytes()
+        except OSError:
+            continue
+        if b'\x00' in data[:8192]:
+            # Binary files are not indexed, and skipped by plain scans too
+            continue
+        text = data.decode('utf-8', errors='replace')
+        for line_number, line in enumerate(text.split('\n'), start=1):
+            if regex.search(line):
+                matches.append({
+                    "path": rel_path,
+                    "line": line_number,
+                    "text": line[:500]
+                })
+                if len(matches) >= max_matches:
+                    return matches
+    return matches
+
+
+def _required_literals(pattern: str) -> list[str]:
+    """Extract literal runs that every match of a regex must contain.
+
+    This is deliberately conservative: patterns with alternation yield no
+    literals, group contents are ignored, and a character followed by an
+    optional quantifier is dropped from its run.
+    """
+    if '|' in pattern:
+        return []
+
+    literals = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            if depth == 0 and escaped and not escaped.isalnum():
+                current.append(escaped)
+            elif current:
+                literals.append(''.join(current))
+                current = []
+            i += 2
+            continue
+        if char == '[':
+            # Skip the character class, honouring "[]...]", "[^]...]" and escapes
+            i += 2 if pattern[i + 1:i + 2] == '^' else 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            char = None
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char in '*?{':
+            # The preceding character may be optional or repeated zero times
+            if current:
+                current.pop()
+            if char == '{':
+                closing = pattern.find('}', i)
+                i = len(pattern) if closing == -1 else closing
+        elif depth == 0 and char not in '.^$+':
+            current.append(char)
+            i += 1
+            continue
+
+        if current:
+            literals.append(''.join(current))
+            current = []
+        i += 1
+
+    if current:
+        literals.append(''.join(current))
+    return [literal for literal in literals if len(literal.encode('utf-8')) >= 3]
+
+
+def _under(subdir: str) -> tuple[str, tuple]:
+    """SQL condition and parameters selecting the paths below a directory of the workspace."""
+    if not subdir:
+        return "1", ()
+    # '0' sorts right after '/', so this range holds exactly the paths under subdir
+    return "path >= ? AND path < ?", (f"{subdir}/", f"{subdir}0")
+
+
+def _glob_filter(paths: list[str], file_glob: Optional[str]) -> list[str]:
+    if not file_glob:
+        return paths
+    return [
+        path for path in paths
+        if fnmatch.fnmatch(path, file_glob) or fnmatch.fnmatch(os.path.basename(path), file_glob)
+    ]
+
+
+def _grep(root: Path, paths: list[str], pattern: str, flags: int, limit: int) -> list[dict]:
+    """Run a regex over files, in-process for a few and on the process pool for many."""
+    if len(paths) < PARALLEL_THRESHOLD:
+        return _grep_files(str(root), paths, pattern, flags, limit, read=lambda path: file_cache.read(path).data)
+
+    matches = []
+    chunks = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+    futures = [_get_pool().submit(_grep_files, str(root), chunk, pattern, flags, limit) for chunk in chunks]
+    # Collect in submission order so results stay sorted by path
+    for future in futures:
+        if len(matches) < limit:
+            matches.extend(future.result())
+        else:
+            future.cancel()
+    return matches
+
+
+def _report(matches: list[dict], max_results: int, files_searched: int) -> dict:
+    return {
+        "matches": matches[:max_results],
+        "match_count": min(len(matches), max_results),
+        "truncated": len(matches) > max_results,
+        "files_searched": files_searched
+    }
+
+
+class TrigramIndex:
+    """On-disk trigram index of the text files under the workspace."""
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Workspace directory; the database is created under it
+
+        Raises:
+            OSError or sqlite3.Error if the index cannot be created
+        """
+        self.root = root
+        index_dir = root / INDEX_DIR
+        index_dir.mkdir(exist_ok=True)
+        self.db = sqlite3.connect(index_dir / INDEX_FILE, check_same_thread=False)
+        # The index can always be rebuilt, so trade durability for write speed
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = OFF")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS dirs;")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.executescript(_SCHEMA)
+        # The connection is shared by tool threads and background warm-up
+        self._lock = threading.RLock()
+
+    def refresh(self, subdir: str = "", stop: Optional[threading.Event] = None) -> dict:
+        """Bring the index up to date with the files on disk, checking every file.
+
+        Args:
+            subdir: Only refresh the files under this directory of the workspace
+                (relative, '/'-separated; default: the whole workspace)
+            stop: If given, the refresh returns early once this is set; the
+                files indexed so far are kept and the rest are picked up by
+                the next refresh
+
+        Returns:
+            Counts of added/updated and removed files, and whether it was stopped
+        """
+        with self._lock:
+            return self._refresh(subdir, stop)
+
+    def update(self, subdir: str = "") -> dict:
+        """Bring the index up to date, checking only directories whose mtime changed.
+
+        Creating, deleting or renaming a file changes the mtime of its
+        directory, and so does every write by the agent's tools, which
+        replace files by renaming. A file rewritten in place by another
+        program keeps its directory's mtime, so it is only picked up by the
+        next `refresh`. Falls back to `refresh` for a directory not seen yet.
+
+        Returns:
+            Counts of added/updated and removed files, as for refresh
+        """
+        with self._lock:
+            return self._update(subdir)
+
+    def _known_files(self, condition: str, params: tuple) -> dict[str, tuple[int, int, int]]:
+        return {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in self.db.execute(
+                f"SELECT id, path, mtime_ns, size FROM files WHERE {condition}", params
+            )
+        }
+
+    def _dir_mtime(self, rel_dir: str) -> Optional[int]:
+        try:
+            return os.stat(self.root / rel_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def _walk(self, start: str, files: dict[str, tuple[int, int]], dirs: dict[str, int],
+              max_depth: Optional[int] = None, stop: Optional[threading.Event] = None) -> bool:
+        """Collect the (mtime_ns, size) of the files and the mtimes of the directories below start.
+
+        A directory's mtime is read before the directory is listed, so a
+        change made while it is being listed shows up on the next update.
+
+        Returns:
+            False if stopped before the walk finished
+        """
+        for entry in walk.iter_entries(self.root, max_depth=max_depth, start=start):
+            if stop is not None and stop.is_set():
+                return False
+            if entry.is_dir:
+                mtime_ns = self._dir_mtime(entry.path)
+                if mtime_ns is not None:
+                    dirs[entry.path] = mtime_ns
+            else:
+                files[entry.path] = (entry.mtime_ns, entry.size)
+        return True
+
+    def _refresh(self, subdir: str = "", stop: Optional[threading.Event] = None) -> dict:
+        condition, params = _under(subdir)
+        known = self._known_files(condition, params)
+
+        files: dict[str, tuple[int, int]] = {}
+        dirs: dict[str, int] = {}
+        mtime_ns = self._dir_mtime(subdir)
+        if mtime_ns is not None:
+            dirs[subdir] = mtime_ns
+        if not self._walk(subdir, files, dirs, stop=stop):
+            return {"updated": 0, "removed": 0, "stopped": True}
+
+        stale = [path for path, stat in files.items() if known.get(path, (None,))[1:] != stat]
+        removed = [known[path][0] for path in known.keys() - files.keys()]
+        return self._apply(stale, files, removed, known, [subdir], dirs, stop)
+
+    def _update(self, subdir: str = "") -> dict:
+        condition, params = _under(subdir)
+        known_dirs = dict(self.db.execute(
+            f"SELECT path, mtime_ns FROM dirs WHERE path = ? OR ({condition})", (subdir, *params)
+        ))
+        if subdir not in known_dirs:
+            return self._refresh(subdir)
+
+        changed = {}
+        for rel_dir, mtime_ns in known_dirs.items():
+            current = self._dir_mtime(rel_dir)
+            # A directory that is gone is dropped when its changed parent is listed
+            if current is not None and current != mtime_ns:
+                changed[rel_dir] = current
+        if not changed:
+            return {"updated": 0, "removed": 0, "stopped": False}
+
+        files: dict[str, tuple[int, int]] = {}
+        dirs: dict[str, int] = dict(changed)
+        known: dict[str, tuple[int, int, int]] = {}
+        dropped = []
+        for rel_dir in changed:
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            dir_condition, dir_params = _under(rel_dir)
+            # Files directly in the directory
+            known.update(self._known_files(
+                f"{dir_condition} AND instr(substr(path, ?), '/') = 0", (*dir_params, len(prefix) + 1)
+            ))
+            listed_dirs: dict[str, int] = {}
+            self._walk(rel_dir, files, listed_dirs, max_depth=1)
+            for child in listed_dirs:
+                if child not in known_dirs:
+                    # A new directory: walk everything below it
+                    dirs[child] = listed_dirs[child]
+                    known.update(self._known_files(*_under(child)))
+                    self._walk(child, files, dirs)
+            dropped.extend(
+                child for child in known_dirs
+                if child.startswith(prefix) and child != rel_dir and "/" not in child[len(prefix):]
+                and child not in listed_dirs
+            )
+
+        for child in dropped:
+            # Deleted, renamed or now ignored: drop everything indexed below it
+            known.update(self._known_files(*_under(child)))
+        stale = [path for path, stat in files.items() if known.get(path, (None,))[1:] != stat]
+        removed = [known[path][0] for path in known.keys() - files.keys()]
+        return self._apply(stale, files, removed, known, dropped, dirs)
+
+    def _apply(self, stale: list[str], files: dict[str, tuple[int, int]], removed: list[int],
+               known: dict[str, tuple[int, int, int]], dropped_dirs: list[str], dirs: dict[str, int],
+               stop: Optional[threading.Event] = None) -> dict:
+        """Index stale files, drop removed ones and record directory mtimes, in one transaction.
+
+        Args:
+            stale: Paths of new or changed files to (re)index
+            files: (mtime_ns, size) of each stale file
+            removed: IDs of indexed files that are gone
+            known: Indexed (id, mtime_ns, size) by path, covering the stale files
+            dropped_dirs: Directories whose recorded mtimes, and those of every
+                directory below them, are cleared before `dirs` is recorded
+            dirs: Directory mtimes to record once every file is indexed
+        """
+        changed = [known[path][0] for path in stale if path in known]
+
+        futures = []
+        if len(stale) < PARALLEL_THRESHOLD:
+            batches = [_index_files(str(self.root), stale)] if stale else []
+        else:
+            chunks = [stale[i:i + BATCH_SIZE] for i in range(0, len(stale), BATCH_SIZE)]
+            futures = [_get_pool().submit(_index_files, str(self.root), chunk) for chunk in chunks]
+            batches = (future.result() for future in futures)
+
+        stopped = False
+        indexed = 0
+        try:
+            with self.db:
+                for file_id in removed + changed:
+                    self.db.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                    self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                for batch in batches:
+                    if stop is not None and stop.is_set():
+                        # Files not inserted yet count as new on the next refresh
+                        stopped = True
+                        break
+                    indexed += len(batch)
+                    postings = []
+                    for rel_path, kind, trigrams in batch:
+                        mtime_ns, size = files[rel_path]
+                        file_id = self.db.execute(
+                            "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+                            (rel_path, mtime_ns, size, kind)
+                        ).lastrowid
+                        postings.extend((trigram, file_id) for trigram in trigrams)
+                    # Inserting in key order keeps B-tree page splits local
+                    postings.sort()
+                    self.db.executemany("INSERT INTO postings (trigram, file_id) VALUES (?, ?)", postings)
+
+                if not stopped:
+                    # Only now are these directories' files all indexed; after a
+                    # stop the old mtimes stay, so the next update lists them again
+                    for rel_dir in dropped_dirs:
+                        condition, params = _under(rel_dir)
+                        self.db.execute(f"DELETE FROM dirs WHERE path = ? OR ({condition})", (rel_dir, *params))
+                    self.db.executemany("INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)", dirs.items())
+        finally:
+            # Leave no batches running once the refresh has stopped or failed
+            for future in futures:
+                future.cancel()
+
+        return {"updated": indexed, "removed": len(removed), "stopped": stopped}
+
+    def candidates(self, pattern: str, subdir: str = "") -> list[str]:
+        """Return the files under a directory of the workspace that may contain a match for a regex."""
+        condition, params = _under(subdir)
+        trigrams = set()
+        for literal in _required_literals(pattern):
+            trigrams.update(_trigrams(literal.encode('utf-8')))
+
+        if not trigrams:
+            query = f"SELECT path FROM files WHERE indexed != {_BINARY} AND {condition}"
+            return [path for (path,) in self.db.execute(query, params)]
+
+        # SQLite limits the number of terms in a compound SELECT
+        terms = list(trigrams)[:400]
+        intersect = " INTERSECT ".join(["SELECT file_id FROM postings WHERE trigram = ?"] * len(terms))
+        query = (
+            f"SELECT path FROM files WHERE (id IN ({intersect}) OR indexed = {_TOO_LARGE}) AND {condition}"
+        )
+        return [path for (path,) in self.db.execute(query, [*terms, *params])]
+
+    def search(self, pattern: str, directory: Path, file_glob: Optional[str] = None,
+               case_sensitive: bool = True, max_results: int = 100) -> dict:
+        """Search the indexed files under a directory for lines matching a regex.
+
+        Args:
+            pattern: Regular expression to search for
+            directory: Directory to search, inside the workspace
+            file_glob: Optional glob that file paths (relative to directory) or names must match
+            case_sensitive: If False, match case-insensitively
+            max_results: Maximum number of matching lines to return
+
+        Returns:
+            A dictionary with the matching lines and search statistics
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        re.compile(pattern, flags)
+        subdir = directory.relative_to(self.root).as_posix()
+        subdir = "" if subdir == "." else subdir
+
+        with self._lock:
+            refreshed = self._update(subdir)
+            candidates = self.candidates(pattern, subdir)
+        if subdir:
+            # Report paths relative to the searched directory
+            candidates = [path[len(subdir) + 1:] for path in candidates]
+        candidates = sorted(_glob_filter(candidates, file_glob))
+
+        # Ask for one extra match so truncation can be detected
+        matches = _grep(directory, candidates, pattern, flags, max_results + 1)
+        return {
+            **_report(matches, max_results, len(candidates)),
+            "index_updated": refreshed["updated"],
+            "index_removed": refreshed["removed"]
+        }
+
+
+def scan(pattern: str, directory: Path, file_glob: Optional[str] = None, case_sensitive: bool = True,
+         max_results: int = 100) -> dict:
+    """Search the files under a directory without an index; arguments as for TrigramIndex.search."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    re.compile(pattern, flags)
+    paths = [entry.path for entry in walk.iter_entries(directory) if not entry.is_dir]
+    paths = sorted(_glob_filter(paths, file_glob))
+    matches = _grep(directory, paths, pattern, flags, max_results + 1)
+    return _report(matches, max_results, len(paths))
+
+
+_index: Optional[TrigramIndex] = None
+# Set once opening the workspace index has failed, so it is not retried
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[TrigramIndex]:
+    """Return the workspace index, opening it on first use, or None if it cannot be written."""
+    global _index, _index_failed
+    with _index_lock:
+        if _index is None and not _index_failed:
+            root = Path.cwd().resolve()
+            try:
+                _index = TrigramIndex(root)
+            except (OSError, sqlite3.Error) as e:
+                _index_failed = True
+                logger.warning("Search index unavailable in %s, falling back to plain scans: %s", root, e)
+        return _index
+
+
+def search(pattern: str, directory: Path, file_glob: Optional[str] = None, case_sensitive: bool = True,
+           max_results: int = 100) -> dict:
+    """Search a directory, through the workspace index when it is inside the workspace.
+
+    Arguments are as for TrigramIndex.search. The result's "indexed" field
+    says whether the index was used.
+    """
+    index = get_index()
+    if index is not None and directory.is_relative_to(index.root):
+        try:
+            return {**index.search(pattern, directory, file_glob, case_sensitive, max_results), "indexed": True}
+        except sqlite3.Error as e:
+            # e.g. the workspace became read-only; the files can still be scanned
+            logger.warning("Search index refresh failed, falling back to a plain scan: %s", e)
+    return {**scan(pattern, directory, file_glob, case_sensitive, max_results), "indexed": False}
+
+
+def warm_index(stop: Optional[threading.Event] = None) -> Optional[dict]:
+    """Refresh the workspace index ahead of the next search.
+
+    Does nothing, and returns None, unless an earlier search created the
+    index, so starting in a large directory that is never searched costs
+    nothing. `stop` is passed to TrigramIndex.refresh.
+    """
+    if _index is None and not (Path.cwd().resolve() / INDEX_DIR / INDEX_FILE).exists():
+        return None
+    index = get_index()
+    return index.refresh(stop=stop) if index is not None else None
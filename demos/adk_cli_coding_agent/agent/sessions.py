@@ -0,0 +1,261 @@
+"""SQLite-backed ADK session service for the coding agent CLI.
+
+Events are stored in an append-only log, one JSON row per event, and each
+event's state delta is also kept in its own column. Every `snapshot_every`
+events the session state is written to a snapshot, so rebuilding the state on
+load means reading one snapshot and replaying only the deltas recorded since,
+without parsing any event. Parsing events is what dominates load time, so a
+resumed session holds only its most recent `resume_events` events, starting at
+a user message. A loaded session is kept in memory and shared with the runner,
+so only the first turn after a resume reads the log.
+
+Simplification: app- and user-scoped state ("app:"/"user:" keys) is stored
+with the session rather than shared across sessions.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    events_since_snapshot INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    state_delta TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+"""
+
+
+class SqliteSessionService(BaseSessionService):
+    """Session service persisting sessions to a local SQLite database."""
+
+    def __init__(self, db_path: str | Path, snapshot_every: int = 100, resume_events: int = 200):
+        """
+        Args:
+            db_path: Path of the database file; parent directories are created
+            snapshot_every: Number of events between state snapshots
+            resume_events: Number of recent events a resumed session holds, or
+                None for all of them; events after the latest snapshot are
+                always included
+        """
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.resume_events = resume_events
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(_SCHEMA)
+        # Sessions already loaded, so later turns do not re-read the event log
+        self._loaded: dict[tuple[str, str, str], Session] = {}
+
+    def _load_state(self, app_name: str, user_id: str, session_id: str) -> dict[str, Any]:
+        """Rebuild a session's state from its snapshot plus later deltas."""
+        row = self.db.execute(
+            "SELECT seq, state FROM snapshots WHERE app_name = ? AND user_id = ? AND session_id = ?",
+            (app_name, user_id, session_id)
+        ).fetchone()
+        snapshot_seq, state = (row[0], json.loads(row[1])) if row else (0, {})
+
+        for (delta,) in self.db.execute(
+            "SELECT state_delta FROM events "
+            "WHERE app_name = ? AND user_id = ? AND session_id = ? AND seq > ? AND state_delta IS NOT NULL "
+            "ORDER BY seq",
+            (app_name, user_id, session_id, snapshot_seq)
+        ):
+            state.update(json.loads(delta))
+        return state
+
+    def _resume_start(self, app_name: str, user_id: str, session_id: str) -> int:
+        """First seq of the events a resumed session holds.
+
+        The tail is extended back to the latest snapshot, then moved to start
+        at a user message, so it never opens with a tool response: forward to
+        the first one in the tail or, if it has none, back to the one before.
+        """
+        where = "app_name = ? AND user_id = ? AND session_id = ?"
+        key = (app_name, user_id, session_id)
+        row = self.db.execute(
+            f"SELECT seq FROM events WHERE {where} ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (*key, self.resume_events - 1)
+        ).fetchone()
+        if row is None:
+            return 0
+        (snapshot_seq,) = self.db.execute(
+            f"SELECT COALESCE(MAX(seq), 0) FROM snapshots WHERE {where}", key
+        ).fetchone()
+        start = min(row[0], snapshot_seq + 1)
+        user_message = (
+            "json_extract(data, '$.author') = 'user' AND json_extract(data, '$.content.parts[0].text') IS NOT NULL"
+        )
+        (user_seq,) = self.db.execute(
+            f"SELECT MIN(seq) FROM events WHERE {where} AND seq >= ? AND {user_message}", (*key, start)
+        ).fetchone()
+        if user_seq is None:
+            (user_seq,) = self.db.execute(
+                f"SELECT MAX(seq) FROM events WHERE {where} AND seq < ? AND {user_message}", (*key, start)
+            ).fetchone()
+        return user_seq if user_seq is not None else start
+
+    def _write_snapshot(self, session: Session, seq: int) -> None:
+        state = {key: value for key, value in session.state.items() if not key.startswith("temp:")}
+        self.db.execute(
+            "INSERT OR REPLACE INTO snapshots (app_name, user_id, session_id, seq, state) VALUES (?, ?, ?, ?, ?)",
+            (session.app_name, session.user_id, session.id, seq, json.dumps(state, default=str))
+        )
+        self.db.execute(
+            "UPDATE sessions SET events_since_snapshot = 0 WHERE app_name = ? AND user_id = ? AND id = ?",
+            (session.app_name, session.user_id, session.id)
+        )
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session = Session(
+            id=session_id or uuid.uuid4().hex,
+            app_name=app_name,
+            user_id=user_id,
+            state=dict(state or {}),
+            last_update_time=time.time()
+        )
+        with self.db:
+            self.db.execute(
+                "INSERT INTO sessions (app_name, user_id, id, last_update_time) VALUES (?, ?, ?, ?)",
+                (app_name, user_id, session.id, session.last_update_time)
+            )
+            self._write_snapshot(session, 0)
+        self._loaded[(app_name, user_id, session.id)] = session
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        if config is None and key in self._loaded:
+            return self._loaded[key]
+
+        row = self.db.execute(
+            "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+            (app_name, user_id, session_id)
+        ).fetchone()
+        if row is None:
+            return None
+
+        where = "app_name = ? AND user_id = ? AND session_id = ?"
+        params: list[Any] = [app_name, user_id, session_id]
+        if config and config.after_timestamp:
+            where += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        if config and config.num_recent_events:
+            query = (
+                f"SELECT data FROM (SELECT seq, data FROM events WHERE {where} ORDER BY seq DESC LIMIT ?) "
+                "ORDER BY seq"
+            )
+            params.append(config.num_recent_events)
+        else:
+            if config is None and self.resume_events is not None:
+                where += " AND seq >= ?"
+                params.append(self._resume_start(app_name, user_id, session_id))
+            query = f"SELECT data FROM events WHERE {where} ORDER BY seq"
+
+        events = [Event.model_validate_json(data) for (data,) in self.db.execute(query, params)]
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=self._load_state(app_name, user_id, session_id),
+            events=events,
+            last_update_time=row[0]
+        )
+        if config is None:
+            self._loaded[key] = session
+        return session
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        query = "SELECT user_id, id, last_update_time FROM sessions WHERE app_name = ?"
+        params = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY last_update_time"
+
+        sessions = [
+            Session(
+                id=session_id,
+                app_name=app_name,
+                user_id=session_user_id,
+                state=self._load_state(app_name, session_user_id, session_id),
+                last_update_time=last_update_time
+            )
+            for session_user_id, session_id, last_update_time in self.db.execute(query, params).fetchall()
+        ]
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._loaded.pop(key, None)
+        with self.db:
+            self.db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self.db.execute("DELETE FROM snapshots WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self.db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        # Applies state to the in-memory session and drops temp: keys from the delta
+        event = await super().append_event(session, event)
+        if event.partial:
+            return event
+
+        state_delta = event.actions.state_delta if event.actions else None
+        session.last_update_time = event.timestamp
+        with self.db:
+            seq = self.db.execute(
+                "INSERT INTO events (app_name, user_id, session_id, timestamp, state_delta, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    session.app_name, session.user_id, session.id, event.timestamp,
+                    json.dumps(state_delta, default=str) if state_delta else None,
+                    event.model_dump_json(exclude_none=True)
+                )
+            ).lastrowid
+            key = (session.app_name, session.user_id, session.id)
+            self.db.execute(
+                "UPDATE sessions SET last_update_time = ?, events_since_snapshot = events_since_snapshot + 1 "
+                "WHERE app_name = ? AND user_id = ? AND id = ?",
+                (event.timestamp, *key)
+            )
+            (pending,) = self.db.execute(
+                "SELECT events_since_snapshot FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone()
+            if pending >= self.snapshot_every:
+                self._write_snapshot(session, seq)
+        return event
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.db.close()
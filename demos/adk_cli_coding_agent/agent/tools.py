@@ -2,18 +2,160 @@
 
 from pathlib import Path
 from typing import Optional
+import codecs
+import fnmatch
+import mmap
+import os
 import random
+import re
+import threading
+import weakref
+from contextlib import ExitStack
 
+from google.adk.tools import ToolContext
 
-# Global plan state
-_current_plan: dict | None = None
+from coding_agent import editing, search, walk
+from coding_agent.cache import CachedFile, file_cache
+from coding_agent.journal import journal
 
 
-def read_file(file_path: str) -> dict:
-    """Read the contents of a file.
+# Size of the leading block inspected to decide whether a file is binary
+_SNIFF_BYTES = 8192
+
+# Chunk size used when scanning a file for newlines
+_CHUNK_BYTES = 1 << 20
+
+
+def _looks_binary(head: bytes) -> bool:
+    """Return True if the leading block of a file does not look like UTF-8 text."""
+    if b'\x00' in head:
+        return True
+    try:
+        # Incremental decode so a multi-byte character cut off at the end of
+        # the block is not mistaken for invalid UTF-8
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def _count_lines(buf, size: int) -> int:
+    """Count lines in a buffer chunk by chunk, without decoding it."""
+    if size == 0:
+        return 0
+    newlines = 0
+    for start in range(0, size, _CHUNK_BYTES):
+        newlines += buf[start:start + _CHUNK_BYTES].count(b'\n')
+    # A final line without a trailing newline still counts as a line
+    return newlines if buf[size - 1:size] == b'\n' else newlines + 1
+
+
+def _line_window(buf, size: int, offset: int, limit: Optional[int]) -> tuple[int, int, int]:
+    """Locate a window of lines in a buffer.
+
+    Args:
+        buf: bytes or mmap holding the file
+        size: Size of the buffer in bytes
+        offset: First line (0-based); negative values count back from the end
+        limit: Maximum number of lines, or None for the rest of the file
+
+    Returns:
+        A tuple of (start_byte, end_byte, line_count) for the window
+    """
+    if offset >= 0:
+        start = 0
+        for _ in range(offset):
+            newline = buf.find(b'\n', start)
+            if newline == -1:
+                return size, size, 0
+            start = newline + 1
+    else:
+        # Walk backwards from the end to find the start of the tail
+        start = 0
+        stop = size - 1 if buf[size - 1:size] == b'\n' else size
+        for _ in range(-offset):
+            newline = buf.rfind(b'\n', 0, stop)
+            if newline == -1:
+                start = 0
+                break
+            start = newline + 1
+            stop = newline
+
+    end = start
+    taken = 0
+    while end < size and (limit is None or taken < limit):
+        newline = buf.find(b'\n', end)
+        end = size if newline == -1 else newline + 1
+        taken += 1
+    return start, end, taken
+
+
+def _read_window(path: Path, buf, info: dict, offset: int, limit: Optional[int], unit: str) -> dict:
+    """Build the read_file result for a window of a file held in a buffer.
+
+    Args:
+        path: Resolved path of the file
+        buf: bytes or mmap holding the whole file
+        info: Memo of values derived from the buffer (binary flag, line count,
+            hash), filled in on first use
+        offset, limit, unit: Window to return, as for read_file
+    """
+    size = len(buf)
+
+    if "is_binary" not in info:
+        info["is_binary"] = _looks_binary(buf[:_SNIFF_BYTES])
+    if info["is_binary"]:
+        return {
+            "success": True,
+            "path": str(path),
+            "content": f"<binary file, {size} bytes>",
+            "size_bytes": size,
+            "lines": None,
+            "is_binary": True
+        }
+
+    if "lines" not in info:
+        info["lines"] = _count_lines(buf, size)
+        info["sha256"] = editing.content_hash(buf)
+    total_lines = info["lines"]
+
+    if unit == "bytes":
+        start = max(size + offset, 0) if offset < 0 else min(offset, size)
+        end = size if limit is None else min(start + limit, size)
+        window_start, window_end = start, end
+    else:
+        start, end, taken = _line_window(buf, size, offset, limit)
+        window_start = max(total_lines + offset, 0) if offset < 0 else min(offset, total_lines)
+        window_end = window_start + taken
+
+    window_total = size if unit == "bytes" else total_lines
+    return {
+        "success": True,
+        "path": str(path),
+        "content": buf[start:end].decode('utf-8', errors='replace'),
+        "size_bytes": size,
+        "lines": total_lines,
+        "unit": unit,
+        "start": window_start,
+        "end": window_end,
+        "has_more": window_end < window_total,
+        "sha256": info["sha256"]
+    }
+
+
+def read_file(file_path: str, offset: int = 0, limit: Optional[int] = None, unit: str = "lines") -> dict:
+    """Read the contents of a file, optionally restricted to a window.
+
+    Files are served from a shared in-memory cache while unchanged on disk.
+    Files too large to cache are memory-mapped, so reading a window of a very
+    large file only touches the pages it needs.
 
     Args:
         file_path: Path to the file to read (relative or absolute)
+        offset: First line (or byte) to read, 0-based. Negative values count
+            back from the end of the file, e.g. offset=-20 reads the last 20 lines
+        limit: Maximum number of lines (or bytes) to return (default: no limit)
+        unit: Either "lines" or "bytes" (default: "lines")
 
     Returns:
         A dictionary containing the file contents and metadata, or error info
@@ -35,30 +177,38 @@ def read_file(file_path: str) -> dict:
                 "path": file_path
             }
 
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
+        if unit not in ("lines", "bytes"):
             return {
-                "success": True,
-                "path": str(path),
-                "content": content,
-                "size_bytes": path.stat().st_size,
-                "lines": len(content.splitlines())
+                "error": "invalid_unit",
+                "message": f"Invalid unit: {unit}. Must be 'lines' or 'bytes'",
+                "path": file_path
             }
-        except UnicodeDecodeError:
-            # Try to read as binary if UTF-8 fails
-            with open(path, 'rb') as f:
-                content_bytes = f.read()
 
+        if limit is not None and limit < 0:
             return {
-                "success": True,
-                "path": str(path),
-                "content": f"<binary file, {len(content_bytes)} bytes>",
-                "size_bytes": len(content_bytes),
-                "lines": None,
-                "is_binary": True
+                "error": "invalid_limit",
+                "message": f"Invalid limit: {limit}. Must be zero or positive",
+                "path": file_path
             }
+
+        stat_result = os.stat(path)
+        cached = file_cache.get(path, stat_result)
+        if cached is None and stat_result.st_size <= file_cache.max_file_bytes:
+            with open(path, 'rb') as f:
+                cached = file_cache.put(path, os.fstat(f.fileno()), f.read())
+
+        if cached is not None:
+            return _read_window(path, cached.data, cached.info, offset, limit, unit)
+
+        # Too large to cache: map the file instead of reading it into memory,
+        # keeping only its hash and line count between reads
+        with open(path, 'rb') as f:
+            info = file_cache.info(path, os.fstat(f.fileno()))
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return _read_window(path, buf, info, offset, limit, unit)
+            finally:
+                buf.close()
     except PermissionError as e:
         return {
             "error": "permission_denied",
@@ -73,13 +223,74 @@ def read_file(file_path: str) -> dict:
         }
 
 
-def write_file(file_path: str, content: str, create_dirs: bool = True) -> dict:
+def _cached_sha256(cached: CachedFile) -> str:
+    """Return the content hash of a cached file, computing it at most once."""
+    if "sha256" not in cached.info:
+        cached.info["sha256"] = editing.content_hash(cached.data)
+    return cached.info["sha256"]
+
+
+def _cache_written(path: Path, data: bytes) -> CachedFile:
+    """Record a file's new contents in the cache right after writing it."""
+    written = file_cache.put(path, os.stat(path), data)
+    written.info["sha256"] = editing.content_hash(data)
+    return written
+
+
+def _stale_content_error(path: Path, expected_sha256: str, actual_sha256: str) -> dict:
+    """Build the error returned when a file no longer matches an expected hash."""
+    return {
+        "error": "stale_content",
+        "message": (
+            f"File has changed since it was read (expected sha256 {expected_sha256[:12]}..., "
+            f"found {actual_sha256[:12]}...). Read it again before editing."
+        ),
+        "path": str(path),
+        "sha256": actual_sha256
+    }
+
+
+# One lock per resolved path, held across each read-modify-write so that
+# concurrent tool calls on a file never overwrite each other's changes
+_path_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(path: Path | str) -> threading.Lock:
+    """Return the lock guarding writes to a resolved path; dropped once unused."""
+    with _path_locks_guard:
+        lock = _path_locks.get(str(path))
+        if lock is None:
+            lock = _path_locks[str(path)] = threading.Lock()
+        return lock
+
+
+def _journal_write(tool_context: Optional[ToolContext], path: Path, before: Optional[CachedFile],
+                   written: CachedFile) -> None:
+    """Record a successful write in the undo journal, with the file's contents from before it."""
+    if tool_context is None:
+        return
+    data = before.data if before is not None else None
+    digest = _cached_sha256(before) if before is not None else None
+    journal.record_write(tool_context.session.id, tool_context.invocation_id, path, data, digest,
+                         written.info["sha256"])
+
+
+def write_file(file_path: str, content: str, create_dirs: bool = True,
+               expected_sha256: Optional[str] = None, fsync: bool = False,
+               tool_context: Optional[ToolContext] = None) -> dict:
     """Write content to a file, creating it if it doesn't exist.
 
+    The file is replaced atomically, so a crash never leaves it half written.
+    The previous contents are journaled so the write can be undone.
+
     Args:
         file_path: Path to the file to write (relative or absolute)
         content: The content to write to the file
         create_dirs: If True, create parent directories if they don't exist
+        expected_sha256: If given, only overwrite the file if its current
+            contents have this hash (as returned by read_file)
+        fsync: If True, flush the write to disk before returning (default: False)
 
     Returns:
         A dictionary with the operation result or error info
@@ -91,19 +302,29 @@ def write_file(file_path: str, content: str, create_dirs: bool = True) -> dict:
         if create_dirs and not path.parent.exists():
             path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Check if file exists
-        existed = path.exists()
+        with _path_lock(path):
+            # Check if file exists
+            existed = path.exists()
+            current = file_cache.read(path) if existed else None
+
+            if expected_sha256 is not None and existed:
+                current_sha256 = _cached_sha256(current)
+                if current_sha256 != expected_sha256:
+                    return _stale_content_error(path, expected_sha256, current_sha256)
 
-        # Write the file
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            # Write the file
+            data = content.encode('utf-8')
+            editing.atomic_write(path, data, fsync=fsync)
+            written = _cache_written(path, data)
+            _journal_write(tool_context, path, current, written)
 
         return {
             "success": True,
             "path": str(path),
             "operation": "updated" if existed else "created",
-            "size_bytes": path.stat().st_size,
-            "lines": len(content.splitlines())
+            "size_bytes": len(data),
+            "lines": len(content.splitlines()),
+            "sha256": written.info["sha256"]
         }
     except PermissionError:
         return {
@@ -119,17 +340,69 @@ def write_file(file_path: str, content: str, create_dirs: bool = True) -> dict:
         }
 
 
-def update_file(file_path: str, old_text: str, new_text: str) -> dict:
+def update_file(file_path: str, old_text: str, new_text: str, occurrence: Optional[int] = None,
+                start_line: Optional[int] = None, end_line: Optional[int] = None,
+                expected_sha256: Optional[str] = None, tool_context: Optional[ToolContext] = None) -> dict:
     """Update a file by replacing old text with new text.
 
+    By default every occurrence is replaced. Returns a unified diff of the
+    change and the new content hash, so the file does not need to be read
+    again before the next edit.
+
     Args:
         file_path: Path to the file to update (relative or absolute)
         old_text: The text to find and replace
         new_text: The text to replace with
+        occurrence: If given, replace only this occurrence (1-based)
+        start_line: If given, only replace matches at or after this line (1-based)
+        end_line: If given, only replace matches starting up to this line (1-based, inclusive)
+        expected_sha256: If given, only edit the file if its current contents
+            have this hash (as returned by read_file or a previous edit)
 
     Returns:
         A dictionary with the operation result or error info
     """
+    edit = {"old_text": old_text, "new_text": new_text}
+    if occurrence is not None:
+        edit["occurrence"] = occurrence
+    if start_line is not None:
+        edit["start_line"] = start_line
+    if end_line is not None:
+        edit["end_line"] = end_line
+
+    result = apply_edits(file_path, [edit], expected_sha256=expected_sha256, tool_context=tool_context)
+
+    # Report in the single-edit shape callers of update_file expect
+    report = result.pop("edits", None)
+    result.pop("missing_edits", None)
+    if result.get("success"):
+        result["replacements"] = report[0]["replacements"]
+        result["matches"] = report[0]["matches"]
+    return result
+
+
+def apply_edits(file_path: str, edits: list[dict], expected_sha256: Optional[str] = None,
+                fsync: bool = False, tool_context: Optional[ToolContext] = None) -> dict:
+    """Apply several text replacements to a file in one atomic write.
+
+    The file is read once, every edit is applied in memory in order, and the
+    result is written back atomically. If any edit matches nothing, no change
+    is written.
+
+    Args:
+        file_path: Path to the file to update (relative or absolute)
+        edits: List of {"old_text": ..., "new_text": ...} replacements. Each
+            may also set "occurrence" (1-based) to replace only that match, and
+            "start_line"/"end_line" (1-based, inclusive) to limit where matches
+            are replaced. Each edit sees the result of the ones before it.
+        expected_sha256: If given, only edit the file if its current contents
+            have this hash (as returned by read_file or a previous edit)
+        fsync: If True, flush the write to disk before returning (default: False)
+
+    Returns:
+        A dictionary with per-edit match and replacement counts, a unified
+        diff of the change and the new content hash, or error info
+    """
     try:
         path = Path(file_path).expanduser().resolve()
 
@@ -140,35 +413,53 @@ def update_file(file_path: str, old_text: str, new_text: str) -> dict:
                 "path": file_path
             }
 
-        # Read current content
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Check if old_text exists
-        if old_text not in content:
-            return {
-                "error": "text_not_found",
-                "message": f"Text not found in file: {old_text[:50]}...",
-                "path": str(path)
-            }
-
-        # Count occurrences
-        occurrences = content.count(old_text)
-
-        # Replace text
-        new_content = content.replace(old_text, new_text)
-
-        # Write back
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        # Held until the write, so concurrent edits to the file apply one after another
+        with _path_lock(path):
+            # Read current content once
+            cached = file_cache.read(path)
+            current_sha256 = _cached_sha256(cached)
+            if expected_sha256 is not None and current_sha256 != expected_sha256:
+                return _stale_content_error(path, expected_sha256, current_sha256)
+            content = cached.data.decode('utf-8')
+
+            new_content, counts = editing.apply_replacements(content, edits)
+            report = [
+                {"index": i, "old_text": edit["old_text"][:50], "matches": matches, "replacements": replaced}
+                for i, (edit, (matches, replaced)) in enumerate(zip(edits, counts))
+            ]
+
+            missing = [i for i, (_, replaced) in enumerate(counts) if replaced == 0]
+            if missing:
+                first = edits[missing[0]]
+                matches = counts[missing[0]][0]
+                if matches and first.get("occurrence") is not None:
+                    message = f"Occurrence {first['occurrence']} not found; only {matches} match(es): {first['old_text'][:50]}..."
+                else:
+                    message = f"Text not found in file: {first['old_text'][:50]}..."
+                return {
+                    "error": "text_not_found",
+                    "message": message,
+                    "path": str(path),
+                    "missing_edits": missing,
+                    "edits": report,
+                    "sha256": current_sha256
+                }
+
+            # Write back
+            new_data = new_content.encode('utf-8')
+            editing.atomic_write(path, new_data, fsync=fsync)
+            written = _cache_written(path, new_data)
+            _journal_write(tool_context, path, cached, written)
 
         return {
             "success": True,
             "path": str(path),
             "operation": "updated",
-            "replacements": occurrences,
-            "size_bytes": path.stat().st_size,
-            "lines": len(new_content.splitlines())
+            "edits": report,
+            "diff": editing.diff_hunks(content, new_content, path.name),
+            "size_bytes": len(new_data),
+            "lines": len(new_content.splitlines()),
+            "sha256": written.info["sha256"]
         }
     except PermissionError:
         return {
@@ -184,16 +475,35 @@ def update_file(file_path: str, old_text: str, new_text: str) -> dict:
         }
 
 
-def list_directory(directory_path: str = ".", pattern: Optional[str] = None, recursive: bool = False) -> dict:
+def _matches_pattern(rel_path: str, pattern: str) -> bool:
+    """Check a relative path against a glob pattern such as "*.py" or "**/*.txt"."""
+    if '/' not in pattern:
+        return fnmatch.fnmatch(rel_path.rsplit('/', 1)[-1], pattern)
+    return fnmatch.fnmatch(rel_path, pattern) or (
+        pattern.startswith('**/') and fnmatch.fnmatch(rel_path, pattern[3:])
+    )
+
+
+def list_directory(directory_path: str = ".", pattern: Optional[str] = None, recursive: bool = False,
+                   max_entries: int = 1000, max_depth: Optional[int] = None,
+                   include_ignored: bool = False) -> dict:
     """List files and directories in a directory.
 
+    Version control, virtualenv, cache and node_modules directories, and paths
+    matched by .gitignore, are skipped unless include_ignored is True.
+
     Args:
         directory_path: Path to the directory to list (default: current directory)
         pattern: Optional glob pattern to filter files (e.g., "*.py", "**/*.txt")
         recursive: If True, list files recursively (default: False)
+        max_entries: Maximum number of files plus directories to return (default: 1000)
+        max_depth: When recursive, the deepest level to list; entries directly
+            inside the directory are level 1 (default: unlimited)
+        include_ignored: If True, do not skip ignored paths (default: False)
 
     Returns:
-        A dictionary containing lists of files and directories or error info
+        A dictionary containing lists of files and directories or error info.
+        "truncated" is True if max_entries was reached before the walk finished.
     """
     try:
         path = Path(directory_path).expanduser().resolve()
@@ -214,40 +524,22 @@ def list_directory(directory_path: str = ".", pattern: Optional[str] = None, rec
 
         files = []
         directories = []
-
-        if pattern:
-            # Use glob with pattern
-            glob_pattern = f"**/{pattern}" if recursive else pattern
-            for item in path.glob(glob_pattern):
-                rel_path = item.relative_to(path)
-                if item.is_file():
-                    files.append({
-                        "name": str(rel_path),
-                        "size_bytes": item.stat().st_size
-                    })
-                elif item.is_dir():
-                    directories.append(str(rel_path))
-        else:
-            # List all items
-            if recursive:
-                for item in path.rglob("*"):
-                    rel_path = item.relative_to(path)
-                    if item.is_file():
-                        files.append({
-                            "name": str(rel_path),
-                            "size_bytes": item.stat().st_size
-                        })
-                    elif item.is_dir():
-                        directories.append(str(rel_path))
+        truncated = False
+
+        depth = max_depth if recursive else 1
+        for entry in walk.iter_entries(path, max_depth=depth, use_ignore=not include_ignored):
+            if pattern and not _matches_pattern(entry.path, pattern):
+                continue
+            if len(files) + len(directories) >= max_entries:
+                truncated = True
+                break
+            if entry.is_dir:
+                directories.append(entry.path)
             else:
-                for item in path.iterdir():
-                    if item.is_file():
-                        files.append({
-                            "name": item.name,
-                            "size_bytes": item.stat().st_size
-                        })
-                    elif item.is_dir():
-                        directories.append(item.name)
+                files.append({
+                    "name": entry.path,
+                    "size_bytes": entry.size
+                })
 
         # Sort for consistent output
         files.sort(key=lambda x: x["name"])
@@ -259,7 +551,8 @@ def list_directory(directory_path: str = ".", pattern: Optional[str] = None, rec
             "files": files,
             "directories": directories,
             "file_count": len(files),
-            "directory_count": len(directories)
+            "directory_count": len(directories),
+            "truncated": truncated
         }
     except PermissionError:
         return {
@@ -274,6 +567,142 @@ def list_directory(directory_path: str = ".", pattern: Optional[str] = None, rec
             "path": directory_path
         }
 
+
+def search_files(pattern: str, directory_path: str = ".", file_glob: Optional[str] = None,
+                 case_sensitive: bool = True, max_results: int = 100) -> dict:
+    """Search file contents under a directory for lines matching a regex.
+
+    Uses a persistent trigram index of the workspace, so a single call can
+    replace reading many files one by one.
+
+    Args:
+        pattern: Regular expression to search for (Python syntax)
+        directory_path: Root directory to search (default: current directory)
+        file_glob: Optional glob pattern to restrict the searched files (e.g., "*.py")
+        case_sensitive: If False, match case-insensitively (default: True)
+        max_results: Maximum number of matching lines to return (default: 100)
+
+    Returns:
+        A dictionary with matching lines (path, line number, text) or error info
+    """
+    try:
+        path = Path(directory_path).expanduser().resolve()
+
+        if not path.is_dir():
+            return {
+                "error": "directory_not_found",
+                "message": f"Directory not found: {directory_path}",
+                "path": directory_path
+            }
+
+        result = search.search(
+            pattern,
+            path,
+            file_glob=file_glob,
+            case_sensitive=case_sensitive,
+            max_results=max_results
+        )
+        return {"success": True, "path": str(path), "pattern": pattern, **result}
+    except re.error as e:
+        return {
+            "error": "invalid_pattern",
+            "message": f"Invalid regular expression: {e}",
+            "pattern": pattern
+        }
+    except PermissionError:
+        return {
+            "error": "permission_denied",
+            "message": f"Permission denied: {directory_path}",
+            "path": directory_path
+        }
+    except Exception as e:
+        return {
+            "error": "unexpected_error",
+            "message": str(e),
+            "path": directory_path
+        }
+
+
+def _undo(tool_context: ToolContext, turn_id: Optional[str], force: bool) -> dict:
+    """Restore the journaled files of one turn, or of the whole session, for the undo tools.
+
+    Each file is locked while it is restored, so an edit running in parallel
+    cannot interleave with the restore.
+
+    Args:
+        tool_context: Context of the tool call, giving the session
+        turn_id: Turn to undo, or None for every pending change in the session
+        force: If True, restore files even if they changed after the agent wrote them
+
+    Returns:
+        The restored and conflicting files, or a conflict error if nothing was restored
+    """
+    session_id = tool_context.session.id
+    paths = sorted(journal.pending_paths(session_id, turn_id))
+    # Lock every file being restored, in a fixed order so two undos cannot deadlock
+    with ExitStack() as stack:
+        for path in paths:
+            stack.enter_context(_path_lock(path))
+        result = journal.undo(session_id, turn_id, force=force, paths=paths)
+    if result["conflicts"] and not result["restored"]:
+        return {
+            "error": "conflict",
+            "message": (
+                "Some files changed after the agent wrote them, so nothing was restored. "
+                "Pass force=True to restore anyway and lose those changes."
+            ),
+            "conflicts": result["conflicts"]
+        }
+    return {"success": True, "restored": result["restored"], "conflicts": result["conflicts"]}
+
+
+def undo_turn(tool_context: ToolContext, force: bool = False) -> dict:
+    """Undo the file changes made by the most recent turn that changed files.
+
+    Files the turn created are deleted and files it changed are restored to
+    their contents from before the turn.
+
+    Args:
+        force: If True, restore files even if they were changed again after the turn
+
+    Returns:
+        The restored files, or error info
+    """
+    try:
+        turn_id = journal.last_turn(tool_context.session.id)
+        if turn_id is None:
+            return {"error": "nothing_to_undo", "message": "No file changes to undo in this session."}
+        result = _undo(tool_context, turn_id, force)
+        if result.get("success"):
+            result["turn_id"] = turn_id
+        return result
+    except Exception as e:
+        return {
+            "error": "unexpected_error",
+            "message": str(e)
+        }
+
+
+def undo_session(tool_context: ToolContext, force: bool = False) -> dict:
+    """Undo every file change made in this session that was not already undone.
+
+    Args:
+        force: If True, restore files even if they were changed outside the agent since
+
+    Returns:
+        The restored files, or error info
+    """
+    try:
+        if journal.last_turn(tool_context.session.id) is None:
+            return {"error": "nothing_to_undo", "message": "No file changes to undo in this session."}
+        return _undo(tool_context, None, force)
+    except Exception as e:
+        return {
+            "error": "unexpected_error",
+            "message": str(e)
+        }
+
+
 def print_affirming_message() -> str:
     """Prints a random affirming message."""
     messages = [
@@ -296,8 +725,35 @@ def print_affirming_message() -> str:
 # ============================================================================
 # Planning Tools
 # ============================================================================
+#
+# The plan lives in ADK session state, so every session has its own plan.
+# A per-session lock guards read-modify-write cycles when a session's tool
+# calls run concurrently, and the plan keeps a running completed count so
+# progress never requires a scan of the tasks.
+
+# Session state key holding the current plan
+PLAN_STATE_KEY = "plan"
+
+# Locks are dropped once no call holds them, like the path locks above
+_plan_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_plan_locks_guard = threading.Lock()
+
+
+def _plan_lock(tool_context: ToolContext) -> threading.Lock:
+    """Return the lock guarding the plan of the tool call's session."""
+    session_id = tool_context.session.id
+    with _plan_locks_guard:
+        lock = _plan_locks.get(session_id)
+        if lock is None:
+            lock = _plan_locks[session_id] = threading.Lock()
+        return lock
 
-def create_plan(title: str, tasks: list[str]) -> dict:
+
+def _progress(plan: dict) -> str:
+    return f"{plan['completed_count']}/{len(plan['tasks'])}"
+
+
+def create_plan(title: str, tasks: list[str], tool_context: ToolContext) -> dict:
     """Create a new plan with a list of tasks.
 
     Args:
@@ -307,25 +763,27 @@ def create_plan(title: str, tasks: list[str]) -> dict:
     Returns:
         The created plan with task statuses
     """
-    global _current_plan
-
-    _current_plan = {
+    plan = {
         "title": title,
         "tasks": [
             {"id": i, "description": task, "completed": False}
             for i, task in enumerate(tasks)
-        ]
+        ],
+        "completed_count": 0
     }
 
+    with _plan_lock(tool_context):
+        tool_context.state[PLAN_STATE_KEY] = plan
+
     return {
         "status": "plan_created",
-        "title": _current_plan["title"],
-        "total_tasks": len(_current_plan["tasks"]),
-        "plan": _current_plan
+        "title": plan["title"],
+        "total_tasks": len(plan["tasks"]),
+        "plan": plan
     }
 
 
-def update_plan(task_id: int, completed: bool) -> dict:
+def update_plan(task_id: int, completed: bool, tool_context: ToolContext) -> dict:
     """Update the completion status of a task in the plan.
 
     Args:
@@ -333,49 +791,51 @@ def update_plan(task_id: int, completed: bool) -> dict:
         completed: Whether the task is completed
 
     Returns:
-        Updated plan information or error info
+        The change made and the new progress, or error info
     """
-    global _current_plan
+    with _plan_lock(tool_context):
+        plan = tool_context.state.get(PLAN_STATE_KEY)
 
-    if _current_plan is None:
-        return {
-            "error": "no_plan",
-            "message": "No plan exists. Create a plan first using create_plan."
-        }
+        if plan is None:
+            return {
+                "error": "no_plan",
+                "message": "No plan exists. Create a plan first using create_plan."
+            }
+
+        if task_id < 0 or task_id >= len(plan["tasks"]):
+            return {
+                "error": "invalid_task_id",
+                "message": f"Invalid task_id: {task_id}. Must be between 0 and {len(plan['tasks']) - 1}",
+                "task_id": task_id,
+                "valid_range": f"0-{len(plan['tasks']) - 1}"
+            }
+
+        task = plan["tasks"][task_id]
+        if task["completed"] != completed:
+            task["completed"] = completed
+            plan["completed_count"] += 1 if completed else -1
+            # Reassign so ADK records the change in the event's state delta
+            tool_context.state[PLAN_STATE_KEY] = plan
 
-    if task_id < 0 or task_id >= len(_current_plan["tasks"]):
         return {
-            "error": "invalid_task_id",
-            "message": f"Invalid task_id: {task_id}. Must be between 0 and {len(_current_plan['tasks']) - 1}",
+            "status": "plan_updated",
             "task_id": task_id,
-            "valid_range": f"0-{len(_current_plan['tasks']) - 1}"
+            "task_description": task["description"],
+            "completed": completed,
+            "progress": _progress(plan),
+            "delta": {"task_id": task_id, "completed": completed}
         }
 
-    _current_plan["tasks"][task_id]["completed"] = completed
-
-    completed_count = sum(1 for t in _current_plan["tasks"] if t["completed"])
-    total_count = len(_current_plan["tasks"])
 
-    return {
-        "status": "plan_updated",
-        "task_id": task_id,
-        "task_description": _current_plan["tasks"][task_id]["description"],
-        "completed": completed,
-        "progress": f"{completed_count}/{total_count}",
-        "plan": _current_plan
-    }
-
-
-def reset_plan() -> dict:
+def reset_plan(tool_context: ToolContext) -> dict:
     """Reset/clear the current plan.
 
     Returns:
         Confirmation of plan reset
     """
-    global _current_plan
-
-    had_plan = _current_plan is not None
-    _current_plan = None
+    with _plan_lock(tool_context):
+        had_plan = tool_context.state.get(PLAN_STATE_KEY) is not None
+        tool_context.state[PLAN_STATE_KEY] = None
 
     return {
         "status": "plan_reset",
@@ -383,26 +843,24 @@ def reset_plan() -> dict:
     }
 
 
-def get_plan() -> dict:
+def get_plan(tool_context: ToolContext) -> dict:
     """Get the current plan.
 
     Returns:
         The current plan or None if no plan exists
     """
-    global _current_plan
+    with _plan_lock(tool_context):
+        plan = tool_context.state.get(PLAN_STATE_KEY)
+
+        if plan is None:
+            return {
+                "status": "no_plan",
+                "plan": None
+            }
 
-    if _current_plan is None:
         return {
-            "status": "no_plan",
-            "plan": None
+            "status": "plan_exists",
+            "title": plan["title"],
+            "progress": _progress(plan),
+            "plan": plan
         }
-
-    completed_count = sum(1 for t in _current_plan["tasks"] if t["completed"])
-    total_count = len(_current_plan["tasks"])
-
-    return {
-        "status": "plan_exists",
-        "title": _current_plan["title"],
-        "progress": f"{completed_count}/{total_count}",
-        "plan": _current_plan
-    }
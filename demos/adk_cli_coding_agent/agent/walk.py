@@ -0,0 +1,185 @@
+"""Directory traversal for the coding agent tools.
+
+Walks a tree breadth-first with os.scandir, so file types come from the
+directory listing itself and only files need a stat call. Ignored directories
+(built-in names plus .gitignore rules) are pruned before they are entered.
+"""
+
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+
+# Directories that are never worth descending into
+IGNORED_DIRS = {
+    ".git", ".hg", ".svn", ".coding_agent", "node_modules", "__pycache__",
+    ".venv", "venv", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox",
+}
+
+
+class WalkEntry(NamedTuple):
+    """A file or directory found during a walk."""
+
+    path: str
+    is_dir: bool
+    size: int
+    mtime_ns: int
+
+
+class IgnoreRule(NamedTuple):
+    """A single parsed .gitignore pattern."""
+
+    base: str
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def _parse_gitignore(path: str, base: str) -> list[IgnoreRule]:
+    """Parse a .gitignore file whose directory is `base` relative to the root."""
+    rules = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # A slash anywhere but the end anchors the pattern to its directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if line:
+            rules.append(IgnoreRule(base, line, negate, dir_only, anchored))
+    return rules
+
+
+def _is_ignored(rel_path: str, name: str, is_dir: bool, rules: list[IgnoreRule]) -> bool:
+    """Apply .gitignore rules to a path; the last matching rule wins."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.anchored:
+            target = rel_path[len(rule.base) + 1:] if rule.base else rel_path
+            matched = fnmatch.fnmatchcase(target, rule.pattern)
+        else:
+            matched = fnmatch.fnmatchcase(name, rule.pattern)
+        if matched:
+            ignored = not rule.negate
+    return ignored
+
+
+def _scan_dir(directory: str, rel_dir: str, rules: list[IgnoreRule],
+              use_ignore: bool) -> tuple[list[IgnoreRule], list[tuple[WalkEntry, str]]]:
+    """List one directory, dropping ignored entries.
+
+    Returns:
+        The ignore rules in effect below this directory, and the kept entries
+        paired with their absolute paths
+    """
+    try:
+        with os.scandir(directory) as it:
+            dir_entries = sorted(it, key=lambda e: e.name)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return rules, []
+
+    if use_ignore and any(e.name == '.gitignore' for e in dir_entries):
+        rules = rules + _parse_gitignore(os.path.join(directory, '.gitignore'), rel_dir)
+
+    kept = []
+    for entry in dir_entries:
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        try:
+            # Never follow directory symlinks, to avoid cycles
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if use_ignore:
+                if is_dir and entry.name in IGNORED_DIRS:
+                    continue
+                if rules and _is_ignored(rel_path, entry.name, is_dir, rules):
+                    continue
+            if is_dir:
+                kept.append((WalkEntry(rel_path, True, 0, 0), entry.path))
+            elif entry.is_file():
+                stat = entry.stat()
+                kept.append((WalkEntry(rel_path, False, stat.st_size, stat.st_mtime_ns), entry.path))
+        except OSError:
+            continue
+    return rules, kept
+
+
+def _enclosing_rules(root: Path) -> list[IgnoreRule]:
+    """Rules from the .gitignore at the root of the repository enclosing root, if any."""
+    for parent in root.parents:
+        if (parent / '.git').exists():
+            rules = _parse_gitignore(str(parent / '.gitignore'), '')
+            prefix = root.relative_to(parent).as_posix()
+            return [
+                rule for rule in rules if not rule.anchored
+            ] + [
+                IgnoreRule('', rule.pattern[len(prefix) + 1:], rule.negate, rule.dir_only, True)
+                for rule in rules
+                if rule.anchored and rule.pattern.startswith(prefix + '/')
+            ]
+    return []
+
+
+def iter_entries(root: Path, max_depth: Optional[int] = None, use_ignore: bool = True,
+                 workers: int = 0, start: str = '') -> Iterator[WalkEntry]:
+    """Yield the files and directories under root, breadth-first.
+
+    Args:
+        root: Directory to walk
+        max_depth: Deepest level to list; entries directly in root are level 1
+            (default: unlimited)
+        use_ignore: If True, skip built-in ignored directories and paths
+            matched by .gitignore files
+        workers: If greater than 1, scan each level's directories on a thread
+            pool of this size (useful on network filesystems)
+        start: Directory below root ('/'-separated) to walk instead of root
+            itself. Paths stay relative to root, and the .gitignore files of
+            root and of the directories between root and start still apply.
+    """
+    root_rules = []
+    if use_ignore:
+        # Honour the .gitignore files of enclosing directories up to the repo root
+        root_rules = _enclosing_rules(root)
+        if start:
+            # start's own .gitignore is read when it is scanned
+            parts = start.split('/')
+            for depth in range(len(parts)):
+                base = '/'.join(parts[:depth])
+                root_rules += _parse_gitignore(str(root / base / '.gitignore'), base)
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    level = [(str(root / start) if start else str(root), start, root_rules)]
+    depth = 1
+    try:
+        while level and (max_depth is None or depth <= max_depth):
+            args = zip(*level)
+            if pool:
+                scans = pool.map(_scan_dir, *args, [use_ignore] * len(level))
+            else:
+                scans = map(_scan_dir, *args, [use_ignore] * len(level))
+
+            next_level = []
+            for rules, kept in scans:
+                for entry, full_path in kept:
+                    yield entry
+                    if entry.is_dir:
+                        next_level.append((full_path, entry.path, rules))
+            level = next_level
+            depth += 1
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
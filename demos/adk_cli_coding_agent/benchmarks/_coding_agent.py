@@ -0,0 +1,19 @@
+"""Make the agent package importable as `coding_agent` when it is not installed.
+
+The package lives in the `agent` directory but imports itself as
+`coding_agent`. Importing this module registers it under that name.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent.parent / "agent"
+
+if importlib.util.find_spec("coding_agent") is None:
+    spec = importlib.util.spec_from_file_location(
+        "coding_agent", AGENT_DIR / "__init__.py", submodule_search_locations=[str(AGENT_DIR)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["coding_agent"] = module
+    spec.loader.exec_module(module)
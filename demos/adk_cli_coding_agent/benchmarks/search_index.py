@@ -0,0 +1,95 @@
+"""Benchmark search_files' trigram index on a generated source tree.
+
+Generates a tree of Python-like files (100k by default) in a temporary
+directory, then times, with the tree as the workspace:
+
+- the first search, which builds the index
+- a search with nothing changed, which only stats directories
+- a search after the agent rewrote a few files
+- a full refresh, as run in the background between turns
+- a plain scan without the index
+
+    python benchmarks/search_index.py [--files 100000] [--files-per-dir 50] [--keep DIR]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import _coding_agent  # noqa: E402,F401
+
+from coding_agent import search  # noqa: E402
+from coding_agent.editing import atomic_write  # noqa: E402
+
+WORDS = ["config", "request", "handler", "session", "token", "parser", "buffer", "index", "cache", "client"]
+
+
+def make_tree(root: Path, files: int, files_per_dir: int) -> None:
+    rng = random.Random(0)
+    for number in range(files):
+        directory = root / f"pkg{number // (files_per_dir * 20)}" / f"mod{number // files_per_dir}"
+        if number % files_per_dir == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        lines = [
+            f"def {rng.choice(WORDS)}_{rng.choice(WORDS)}_{number}_{line}(value):\n"
+            f"    return value.{rng.choice(WORDS)}({line})\n"
+            for line in range(20)
+        ]
+        if number % 1000 == 0:
+            lines.append("RARE_MARKER = True\n")
+        (directory / f"file{number}.py").write_text("".join(lines))
+
+
+def timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<32} {(time.perf_counter() - started) * 1000:>10.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--keep", metavar="DIR", help="Generate the tree in DIR and keep it (reused if present)")
+    args = parser.parse_args()
+
+    if args.keep:
+        run(Path(args.keep).resolve(), args.files, args.files_per_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="search_bench_") as tmp:
+            run(Path(tmp).resolve(), args.files, args.files_per_dir)
+            # Leave the tree before it is deleted
+            os.chdir(tempfile.gettempdir())
+
+
+def run(root: Path, files: int, files_per_dir: int) -> None:
+    if not (root / "pkg0").exists():
+        root.mkdir(parents=True, exist_ok=True)
+        timed(f"generate {files} files", make_tree, root, files, files_per_dir)
+    # The index covers the working directory
+    os.chdir(root)
+
+    query = lambda: search.search("RARE_MARKER", root, max_results=1000)  # noqa: E731
+    result = timed("first search (builds index)", query)
+    print(f"  {result['match_count']} matches in {result['files_searched']} candidate files")
+    timed("search, nothing changed", query)
+    timed("search, nothing changed", query)
+
+    changed = sorted(root.rglob("file*.py"))[:10]
+    for path in changed:
+        atomic_write(path, path.read_bytes() + b"RARE_MARKER = False\n")
+    result = timed(f"search after {len(changed)} agent writes", query)
+    print(f"  {result['index_updated']} files re-indexed")
+
+    timed("full refresh (between turns)", search.get_index().refresh)
+    timed("plain scan, no index", search.scan, "RARE_MARKER", root, None, True, 1000)
+
+
+if __name__ == "__main__":
+    main()
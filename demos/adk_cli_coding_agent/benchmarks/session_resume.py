@@ -0,0 +1,81 @@
+"""Benchmark resuming a stored session with SqliteSessionService.
+
+Writes sessions of increasing length, each turn a user message, a tool call,
+its response and an answer, then times get_session on a fresh service as
+`--resume` does, with the default recent-event tail and with all events.
+
+    python benchmarks/session_resume.py [--sizes 100 1000 5000 20000]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import _coding_agent  # noqa: E402,F401
+
+from google.adk.events.event import Event  # noqa: E402
+from google.adk.events.event_actions import EventActions  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from coding_agent.sessions import SqliteSessionService  # noqa: E402
+
+APP, USER = "bench", "bench_user"
+
+
+def turn_events(turn: int) -> list[Event]:
+    """The four events of one agent turn."""
+    path = f"src/module_{turn}.py"
+    return [
+        Event(author="user", content=types.Content(role="user", parts=[types.Part(text=f"Fix the bug in {path}")])),
+        Event(author="coding_agent", content=types.Content(role="model", parts=[types.Part(
+            function_call=types.FunctionCall(id=f"call-{turn}", name="read_file", args={"file_path": path})
+        )])),
+        Event(author="coding_agent", content=types.Content(role="user", parts=[types.Part(
+            function_response=types.FunctionResponse(id=f"call-{turn}", name="read_file", response={
+                "success": True, "path": path, "content": "def f(x):\n    return x + 1\n" * 40
+            })
+        )])),
+        Event(author="coding_agent", content=types.Content(role="model", parts=[types.Part(text="Fixed it.")]),
+              actions=EventActions(state_delta={"last_file": path})),
+    ]
+
+
+async def write_session(db_path: Path, events: int) -> str:
+    service = SqliteSessionService(db_path)
+    session = await service.create_session(app_name=APP, user_id=USER)
+    for turn in range((events + 3) // 4):
+        for event in turn_events(turn):
+            await service.append_event(session, event)
+    service.close()
+    return session.id
+
+
+async def time_resume(db_path: Path, session_id: str, resume_events) -> tuple[float, int]:
+    service = SqliteSessionService(db_path, resume_events=resume_events)
+    started = time.perf_counter()
+    session = await service.get_session(app_name=APP, user_id=USER, session_id=session_id)
+    elapsed = time.perf_counter() - started
+    service.close()
+    return elapsed * 1000, len(session.events)
+
+
+async def main(sizes: list[int]) -> None:
+    print(f"{'events':>8} {'tail ms':>9} {'loaded':>7} {'all ms':>9} {'loaded':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db_path = Path(tmp) / f"sessions_{size}.sqlite"
+            session_id = await write_session(db_path, size)
+            tail_ms, tail_count = await time_resume(db_path, session_id, 200)
+            all_ms, all_count = await time_resume(db_path, session_id, None)
+            print(f"{size:>8} {tail_ms:>9.1f} {tail_count:>7} {all_ms:>9.1f} {all_count:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
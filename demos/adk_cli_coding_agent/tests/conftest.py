@@ -0,0 +1,26 @@
+import importlib
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The package lives in the agent directory but imports itself as coding_agent
+AGENT_DIR = Path(__file__).resolve().parent.parent / "agent"
+
+# Importing the package starts logging to coding_agent.log in the working
+# directory, so import it from a scratch directory
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="coding_agent_tests_"))
+try:
+    if importlib.util.find_spec("coding_agent") is None:
+        spec = importlib.util.spec_from_file_location(
+            "coding_agent", AGENT_DIR / "__init__.py", submodule_search_locations=[str(AGENT_DIR)]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["coding_agent"] = module
+        spec.loader.exec_module(module)
+    else:
+        importlib.import_module("coding_agent")
+finally:
+    os.chdir(_cwd)
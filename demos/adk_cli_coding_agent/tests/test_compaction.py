@@ -0,0 +1,164 @@
+"""Offline tests for ContextCompactor, on request contents built by hand."""
+
+from types import SimpleNamespace
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from coding_agent.compaction import ContextCompactor, estimate_tokens
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def call(name, **args):
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+
+
+def response(name, **data):
+    return types.Content(role="user", parts=[types.Part(
+        function_response=types.FunctionResponse(name=name, response=data)
+    )])
+
+
+def read(path, start, end, content="x = 1\n" * 50, success=True):
+    return response("read_file", success=success, path=path, unit="lines", start=start, end=end, content=content)
+
+
+def compact(compactor, contents, session_id="session"):
+    """Run the compactor as ADK would, through its before_model callback."""
+    request = LlmRequest(contents=list(contents))
+    callback_context = SimpleNamespace(session=SimpleNamespace(id=session_id))
+    compactor.before_model(callback_context, request)
+    return request.contents, compactor.history[session_id][-1]
+
+
+def stubbed(content):
+    data = content.parts[0].function_response.response
+    return data.get("status") == "superseded"
+
+
+def test_reads_covered_by_later_reads_or_edits_are_stubbed():
+    contents = [
+        user("look at the files"),
+        read("a.py", 0, 50),          # 1: read again in full later -> stubbed
+        read("b.py", 0, 50),          # 2: b.py edited later -> stubbed
+        read("c.py", 0, 10),          # 3: later read covers it -> stubbed
+        read("d.py", 0, 50),          # 4: only part of it read later -> kept
+        read("e.py", 0, 50, success=False),  # 5: failed read -> kept
+        response("update_file", success=True, path="b.py"),
+        read("a.py", 0, 50),          # 7: latest read -> kept
+        read("c.py", 0, 20),          # 8
+        read("d.py", 10, 20),         # 9
+        model("done"),
+    ]
+
+    compacted, stats = compact(ContextCompactor(), contents)
+
+    stubbed_indexes = [
+        i for i, content in enumerate(compacted) if content.parts[0].function_response and stubbed(content)
+    ]
+    assert stubbed_indexes == [1, 2, 3]
+    assert stats["stubbed_reads"] == 3
+    assert stats["summarized_turns"] == 0
+    for i in (0, 4, 5, 6, 7, 8, 9, 10):
+        assert compacted[i] is contents[i]
+
+
+def test_undo_counts_as_an_edit_of_every_restored_file():
+    contents = [
+        user("undo that"),
+        read("a.py", 0, 50),
+        read("b.py", 0, 50),
+        response("undo_turn", success=True, restored=[{"path": "a.py"}]),
+    ]
+
+    compacted, stats = compact(ContextCompactor(), contents)
+
+    assert stubbed(compacted[1])
+    assert not stubbed(compacted[2])
+    assert stats["stubbed_reads"] == 1
+
+
+def test_tokens_saved_is_the_difference_in_estimated_size():
+    contents = [user("read a.py twice"), read("a.py", 0, 50), read("a.py", 0, 50)]
+
+    compacted, stats = compact(ContextCompactor(), contents)
+
+    assert stats["tokens_before"] == estimate_tokens(contents)
+    assert stats["tokens_after"] == estimate_tokens(compacted)
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 0
+
+
+def test_nothing_changes_under_budget_without_superseded_reads():
+    contents = [user("hi"), model("hello"), user("read a.py"), read("a.py", 0, 50), model("ok")]
+
+    compacted, stats = compact(ContextCompactor(), contents)
+
+    assert compacted == contents
+    assert stats["tokens_saved"] == 0
+
+
+def make_turns(count):
+    """count turns, each a request, a tool call and response, and an answer."""
+    contents = []
+    for turn in range(count):
+        contents += [
+            user(f"request {turn}"),
+            call("list_directory", directory_path=f"dir{turn}"),
+            response("list_directory", success=True, path=f"dir{turn}", files=[f"f{i}.py" for i in range(100)]),
+            model(f"answer {turn}"),
+        ]
+    return contents
+
+
+def test_turns_before_the_last_six_are_summarized_over_budget():
+    summarized = []
+
+    def summarize(turns):
+        summarized.append(turns)
+        return "SUMMARY"
+
+    contents = make_turns(10)
+    compactor = ContextCompactor(max_context_tokens=1000, keep_recent_turns=6, summarize=summarize)
+    compacted, stats = compact(compactor, contents)
+
+    # Turns 0-3 go to the summarizer, each starting with its request
+    assert len(summarized) == 1
+    assert [turn[0].parts[0].text for turn in summarized[0]] == [f"request {i}" for i in range(4)]
+    assert stats["summarized_turns"] == 4
+
+    # The last 6 turns are kept verbatim, the summary prepended to the first
+    kept = contents[4 * 4:]
+    first = compacted[0]
+    assert first.parts[0].text == "[Summary of the earlier conversation]\nSUMMARY\n[End of summary]"
+    assert first.parts[1:] == kept[0].parts
+    assert compacted[1:] == kept[1:]
+    assert stats["tokens_saved"] == estimate_tokens(contents) - estimate_tokens(compacted)
+
+
+def test_summaries_are_reused_across_calls():
+    calls = []
+    compactor = ContextCompactor(max_context_tokens=1000, summarize=lambda turns: calls.append(turns) or "SUMMARY")
+    contents = make_turns(10)
+
+    first, _ = compact(compactor, contents)
+    second, _ = compact(compactor, contents)
+
+    assert len(calls) == 1
+    assert first == second
+
+
+def test_recent_turns_are_never_summarized():
+    compactor = ContextCompactor(max_context_tokens=10, keep_recent_turns=6, summarize=lambda turns: "SUMMARY")
+    contents = make_turns(6)
+
+    compacted, stats = compact(compactor, contents)
+
+    assert compacted == contents
+    assert stats["summarized_turns"] == 0
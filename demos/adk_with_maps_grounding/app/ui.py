@@ -1,48 +1,149 @@
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import asyncio
+import functools
+import json
 import sys
 import os
 import re
-from typing import List, Dict
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, List, Dict, Optional, Tuple
+
+from google.adk.agents import RunConfig
+from google.adk.agents.run_config import StreamingMode
 
 # Add the parent directory to the path so we can import maps_agent
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from maps_agent.run_agent import run_agent
+from maps_agent.event_extractor import EventExtractor
+from maps_agent.run_agent import get_runner, close_runner
+from util_generate_with_maps import get_response_cache
+
+# Existing anchors and tags are copied through untouched
+_MARKUP = r'<a\b[^>]*>[\s\S]*?</a>|<[^>]*>'
+
+def _trie_pattern(titles: List[str]) -> str:
+    """
+    Build a regex matching any of the titles, preferring the longest.
+
+    Titles sharing a prefix share a branch, so the matcher does not retry
+    every title at every position the way a flat alternation would.
+    """
+    trie: Dict = {}
+    for title in titles:
+        node = trie
+        for char in title:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        # Longer matches are tried first; the empty branch ends a shorter title
+        if '' in node:
+            branches.append('')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+@functools.lru_cache(maxsize=256)
+def _link_matcher(links: Tuple[Tuple[str, str], ...]) -> Tuple["re.Pattern[str]", Dict[str, Tuple[str, str]]]:
+    """Compile the matcher for a set of (title, uri) links, and map lowercased titles to links."""
+    by_title: Dict[str, Tuple[str, str]] = {}
+    for title, uri in links:
+        if title:
+            by_title.setdefault(title.lower(), (title, uri))
+    pattern = re.compile(
+        r'(' + _MARKUP + r')|\b(' + _trie_pattern(list(by_title)) + r')\b',
+        flags=re.IGNORECASE
+    )
+    return pattern, by_title
 
 def add_inline_links(text: str, grounding_links: List[Dict]) -> str:
     """
     Add inline links to grounded places mentioned in the text.
+
+    All titles are matched in a single pass, longest first and as whole words
+    (case insensitive), so a link is never inserted inside another one.
     """
     if not text or not grounding_links:
         return text
-    
-    # Create a copy of the text to modify
-    result_text = text
-    
-    # Process links from longest title to shortest to avoid partial matches
-    sorted_links = sorted(grounding_links, key=lambda x: len(x['title']), reverse=True)
-    
-    for link in sorted_links:
-        title = link['title']
-        uri = link['uri']
-        
-        # Create pattern that matches the title as whole words (case insensitive)
-        # Use word boundaries to avoid partial matches
-        pattern = r'\b' + re.escape(title) + r'\b'
-        
-        # Create the replacement link HTML
-        replacement = f'<a href="{uri}" target="_blank" rel="noopener noreferrer" class="text-blue-600 hover:text-blue-800 underline">{title}</a>'
-        
-        # Replace all occurrences (case insensitive)
-        result_text = re.sub(pattern, replacement, result_text, flags=re.IGNORECASE)
-    
-    return result_text
 
-app = FastAPI()
+    pattern, by_title = _link_matcher(tuple((link['title'], link['uri']) for link in grounding_links))
+
+    def replace(match: "re.Match[str]") -> str:
+        link = None if match.group(1) else by_title.get(match.group(2).lower())
+        if link is None:
+            return match.group(0)
+        title, uri = link
+        return f'<a href="{uri}" target="_blank" rel="noopener noreferrer" class="text-blue-600 hover:text-blue-800 underline">{title}</a>'
+
+    return pattern.sub(replace, text)
+
+def blurb_prompt(address: str, persona: str, other_notes: str) -> str:
+    """
+    Construct the prompt for the blurb generator.
+    """
+    prompt = f"Generate a blurb about {address} that would appeal to {persona}. Write it in a natural, engaging way without being overly obvious about the target audience"
+    if other_notes.strip():
+        prompt += f". Additional notes: {other_notes}"
+    return prompt
+
+def sse(event: str, data: Dict) -> str:
+    """
+    Format one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_answer(prompt: str, session_id: Optional[str] = None) -> AsyncGenerator[str, None]:
+    """
+    Run the agent and stream its answer as Server-Sent Events.
+
+    Events, in order:
+    - session: {"session_id"}, sent before the model is called
+    - delta: {"text"}, each piece of response text as it is generated
+    - links: {"grounding_links", "widget_context_token"}, when grounding arrives
+    - done: {"html", "widget_context_token"}, the rendered response with inline links
+    - error: {"html", "message"}, if the agent fails
+    """
+    runner = get_runner()
+    try:
+        session_id = await runner.get_or_create_session(session_id)
+        yield sse("session", {"session_id": session_id})
+
+        extractor = EventExtractor()
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+        async for event in runner.stream(prompt, session_id, run_config):
+            delta, new_links = extractor.add(event)
+            if delta:
+                yield sse("delta", {"text": delta})
+            if new_links:
+                yield sse("links", {"grounding_links": new_links, "widget_context_token": extractor.widget_context_token})
+
+        extracted = extractor.result()
+        html = templates.get_template("_response.html").render(
+            response=add_inline_links(extracted.text, extracted.grounding_links),
+            grounding_links=extracted.grounding_links,
+            widget_context_token=extracted.widget_context_token
+        )
+        yield sse("done", {"html": html, "widget_context_token": extracted.widget_context_token})
+    except Exception as e:
+        html = templates.get_template("_response.html").render(error=str(e))
+        yield sse("error", {"html": html, "message": str(e)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One runner and session service serve every request
+    get_runner()
+    yield
+    await close_runner()
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory="app/templates")
 
 @app.get("/", response_class=HTMLResponse)
@@ -54,45 +155,21 @@ async def blurb_generator(request: Request):
     return templates.TemplateResponse("index.html", {"request": request, "active_tab": "blurb"})
 
 @app.post("/ask", response_class=HTMLResponse)
-async def ask_question(request: Request, question: str = Form(...)):
+async def ask_question(request: Request, question: str = Form(...), session_id: str = Form("")):
     try:
-        events = await run_agent(question)
-        # Extract the response content, grounding links, and widget token from events
-        response = ""
-        grounding_links = []
-        widget_context_token = None
-        
-        for event in events:
-            if hasattr(event, 'content') and event.author == "maps_agent":
-                # Extract text from content parts
-                if hasattr(event.content, 'parts') and event.content.parts:
-                    # Get text from the first part
-                    response = event.content.parts[0].text if event.content.parts[0].text else ""
-                else:
-                    response = str(event.content)
-            
-            # Extract grounding metadata if available
-            if hasattr(event, 'grounding_metadata') and event.grounding_metadata:
-                # Get the widget context token
-                widget_context_token = getattr(event.grounding_metadata, 'google_maps_widget_context_token', None)
-                
-                grounding_chunks = getattr(event.grounding_metadata, 'grounding_chunks', [])
-                for chunk in grounding_chunks:
-                    if hasattr(chunk, 'maps') and chunk.maps:
-                        maps_data = chunk.maps
-                        if hasattr(maps_data, 'title') and hasattr(maps_data, 'uri'):
-                            grounding_links.append({
-                                'title': maps_data.title,
-                                'uri': maps_data.uri,
-                                'place_id': getattr(maps_data, 'place_id', None)
-                            })
-        
+        # Follow-up questions continue the conversation in the same session
+        session_id, events = await get_runner().run(question, session_id or None)
+        extracted = EventExtractor().extend(events).result()
+        grounding_links = extracted.grounding_links
+        widget_context_token = extracted.widget_context_token
+
         # Add inline links to the response text
-        response_with_links = add_inline_links(response, grounding_links)
+        response_with_links = add_inline_links(extracted.text, grounding_links)
         
         return templates.TemplateResponse("index.html", {
             "request": request,
             "question": question,
+            "session_id": session_id,
             "response": response_with_links,
             "grounding_links": grounding_links,
             "widget_context_token": widget_context_token,
@@ -102,6 +179,7 @@ async def ask_question(request: Request, question: str = Form(...)):
         return templates.TemplateResponse("index.html", {
             "request": request,
             "question": question,
+            "session_id": session_id,
             "error": str(e),
             "active_tab": "ask"
         })
@@ -109,44 +187,15 @@ async def ask_question(request: Request, question: str = Form(...)):
 @app.post("/generate-blurb", response_class=HTMLResponse)
 async def generate_blurb(request: Request, address: str = Form(...), persona: str = Form(...), other_notes: str = Form("")):
     try:
-        # Construct the prompt
-        prompt = f"Generate a blurb about {address} that would appeal to {persona}. Write it in a natural, engaging way without being overly obvious about the target audience"
-        if other_notes.strip():
-            prompt += f". Additional notes: {other_notes}"
-        
-        events = await run_agent(prompt)
-        # Extract the response content, grounding links, and widget token from events
-        response = ""
-        grounding_links = []
-        widget_context_token = None
-        
-        for event in events:
-            if hasattr(event, 'content') and event.author == "maps_agent":
-                # Extract text from content parts
-                if hasattr(event.content, 'parts') and event.content.parts:
-                    # Get text from the first part
-                    response = event.content.parts[0].text if event.content.parts[0].text else ""
-                else:
-                    response = str(event.content)
-            
-            # Extract grounding metadata if available
-            if hasattr(event, 'grounding_metadata') and event.grounding_metadata:
-                # Get the widget context token
-                widget_context_token = getattr(event.grounding_metadata, 'google_maps_widget_context_token', None)
-                
-                grounding_chunks = getattr(event.grounding_metadata, 'grounding_chunks', [])
-                for chunk in grounding_chunks:
-                    if hasattr(chunk, 'maps') and chunk.maps:
-                        maps_data = chunk.maps
-                        if hasattr(maps_data, 'title') and hasattr(maps_data, 'uri'):
-                            grounding_links.append({
-                                'title': maps_data.title,
-                                'uri': maps_data.uri,
-                                'place_id': getattr(maps_data, 'place_id', None)
-                            })
-        
+        prompt = blurb_prompt(address, persona, other_notes)
+        # Each blurb is generated in a fresh session
+        _, events = await get_runner().run(prompt)
+        extracted = EventExtractor().extend(events).result()
+        grounding_links = extracted.grounding_links
+        widget_context_token = extracted.widget_context_token
+
         # Add inline links to the response text
-        response_with_links = add_inline_links(response, grounding_links)
+        response_with_links = add_inline_links(extracted.text, grounding_links)
         
         return templates.TemplateResponse("index.html", {
             "request": request,
@@ -168,6 +217,27 @@ async def generate_blurb(request: Request, address: str = Form(...), persona: st
             "active_tab": "blurb"
         })
 
+@app.get("/cache-stats")
+async def cache_stats():
+    cache = get_response_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+@app.post("/ask/stream")
+async def ask_question_stream(question: str = Form(...), session_id: str = Form("")):
+    return StreamingResponse(
+        stream_answer(question, session_id or None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate-blurb/stream")
+async def generate_blurb_stream(address: str = Form(...), persona: str = Form(...), other_notes: str = Form("")):
+    return StreamingResponse(
+        stream_answer(blurb_prompt(address, persona, other_notes)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,7 +2,7 @@ import asyncio
 import sys
 import json
 import argparse
-from .run_agent import run_agent
+from .run_agent import run_agent, close_runner
 
 
 async def main():
@@ -13,6 +13,7 @@ async def main():
     args = parser.parse_args()
     
     events = await run_agent(args.query)
+    await close_runner()
     
     if args.output:
         # Convert events to serializable format
@@ -1,35 +1,54 @@
 from collections.abc import AsyncGenerator
+from typing import Union
 from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent, BaseAgent, LoopAgent, SequentialAgent, InvocationContext
+from google.adk.agents.run_config import StreamingMode
 from google.adk.events.event import Event
 from google.adk.models.llm_response import LlmResponse
+from google.adk.utils.context_utils import Aclosing
+from google.genai import types
 
-from rich import print
-
-from util_generate_with_maps import generate_with_maps_grounding
+from util_generate_with_maps import (
+    generate_with_maps_grounding_async,
+    generate_with_maps_grounding_stream,
+    has_content,
+    merge_stream_chunks,
+)
 
 class MapsAgent(BaseAgent):
-    
+
+    def _event(self, response: Union[types.GenerateContentResponse, str], partial: bool = False) -> Event:
+        """Wrap a model response, or the message used when there is none, in an event."""
+        if isinstance(response, str):
+            return Event(author=self.name, content=types.Content(role="model", parts=[types.Part(text=response)]))
+        fields = LlmResponse.create(response).model_dump()
+        fields["partial"] = partial or None
+        return Event(**fields, author=self.name)
+
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         """Core logic to run this agent via text-based conversation."""
-        print("Input InvocationContext Object:")
-        print(ctx)
-        contents = [e.content for e in ctx.session.events]
-        response = generate_with_maps_grounding(contents=contents)
-        event = Event(
-            **LlmResponse.create(response).model_dump(), 
-            author=self.name
-        )
-        print("Output Event Object:")
-        print(event)
-        yield event
+        contents = [e.content for e in ctx.session.events if e.content]
+
+        if ctx.run_config and ctx.run_config.streaming_mode == StreamingMode.SSE:
+            # Forward each chunk as a partial event, then the whole response
+            chunks = []
+            async with Aclosing(generate_with_maps_grounding_stream(contents=contents)) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    if has_content(chunk):
+                        yield self._event(chunk, partial=True)
+            response = merge_stream_chunks(chunks)
+            if not has_content(response):
+                response = "No content generated."
+        else:
+            response = await generate_with_maps_grounding_async(contents=contents)
+
+        yield self._event(response)
 
 
 root_agent = MapsAgent(
     name="maps_agent",
     description="An agent that can provide information about locations using Google Maps.",
 )
-
-
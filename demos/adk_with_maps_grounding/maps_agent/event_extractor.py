@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.events.event import Event
+
+
+@dataclass(slots=True)
+class ExtractedResponse:
+    """
+    The parts of a maps agent run that the UI renders.
+    """
+    text: str = ""
+    # {'title', 'uri', 'place_id'} per grounded place, without duplicates
+    grounding_links: List[Dict] = field(default_factory=list)
+    widget_context_token: Optional[str] = None
+
+
+class EventExtractor:
+    """
+    Collects the response text, grounded places and widget token from agent events.
+
+    Feed events to `add` as they arrive; `result` can be called at any time.
+    Grounded places are deduplicated by place ID (or URI when there is none).
+    """
+
+    def __init__(self, author: str = "maps_agent"):
+        """
+        Args:
+            author: Name of the agent whose text is the response
+        """
+        self.author = author
+        # Text of the latest complete response, and of the one being streamed
+        self._final: Optional[str] = None
+        self._streamed: List[str] = []
+        self._places: Dict[str, Dict] = {}
+        self._widget_context_token: Optional[str] = None
+
+    def add(self, event: Event) -> Tuple[str, List[Dict]]:
+        """
+        Consume one event.
+
+        Returns:
+            The response text this event adds and the places it grounds for the first time
+        """
+        delta = ""
+        text = None
+        parts = event.content.parts if event.content is not None and event.author == self.author else None
+        if parts:
+            if len(parts) == 1:
+                text = parts[0].text if not parts[0].thought else None
+            else:
+                text = "".join(part.text for part in parts if part.text and not part.thought)
+        # Function calls and responses carry no text and leave the response as is
+        if text and event.partial:
+            self._streamed.append(text)
+            delta = text
+        elif text:
+            # A final event repeats the text already streamed as partial events
+            streamed = "".join(self._streamed)
+            if not streamed:
+                delta = text
+            elif text.startswith(streamed):
+                delta = text[len(streamed):]
+            self._final = text
+            self._streamed = []
+
+        new_places = []
+        grounding_metadata = event.grounding_metadata
+        if grounding_metadata is not None:
+            if grounding_metadata.google_maps_widget_context_token:
+                self._widget_context_token = grounding_metadata.google_maps_widget_context_token
+            for chunk in grounding_metadata.grounding_chunks or ():
+                maps = chunk.maps
+                if maps is None or not maps.title or not maps.uri:
+                    continue
+                key = maps.place_id or maps.uri
+                if key not in self._places:
+                    place = {'title': maps.title, 'uri': maps.uri, 'place_id': maps.place_id}
+                    self._places[key] = place
+                    new_places.append(place)
+        return delta, new_places
+
+    def extend(self, events: List[Event]) -> "EventExtractor":
+        """
+        Consume a list of events.
+        """
+        for event in events:
+            self.add(event)
+        return self
+
+    @property
+    def widget_context_token(self) -> Optional[str]:
+        return self._widget_context_token
+
+    def result(self) -> ExtractedResponse:
+        """
+        Return what has been extracted so far.
+        """
+        return ExtractedResponse(
+            text="".join(self._streamed) or self._final or "",
+            grounding_links=list(self._places.values()),
+            widget_context_token=self._widget_context_token,
+        )
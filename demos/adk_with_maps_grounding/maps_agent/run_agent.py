@@ -1,43 +1,155 @@
 import asyncio
-from typing import List
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, List, Optional, Tuple
 from dotenv import load_dotenv
 from google.adk.sessions import InMemorySessionService
 from google.adk import Runner
+from google.adk.agents import BaseAgent, RunConfig
 from google.adk.events.event import Event
+from google.adk.utils.context_utils import Aclosing
 from google.genai import types
 from .agent import root_agent
 
 load_dotenv()
 
-async def run_agent(query: str) -> List[Event]:
+APP_NAME = "maps_agent"
+USER_ID = "test_user"
+
+
+class AgentRunner:
+    """
+    A long-lived Runner and session service shared by all queries.
+
+    Sessions are kept so follow-up questions can continue a conversation.
+    Sessions idle for longer than `session_ttl` seconds, or beyond the
+    `max_sessions` most recently used, are deleted.
+    """
+
+    def __init__(self, agent: BaseAgent = root_agent, max_sessions: int = 1000, session_ttl: float = 3600):
+        """
+        Args:
+            agent: The agent to run
+            max_sessions: Maximum number of sessions kept in memory
+            session_ttl: Seconds a session is kept after its last use
+        """
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(session_service=self.session_service, app_name=APP_NAME, agent=agent)
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        # Session ID -> time of last use, least recently used first
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        # Follow-ups in the same session run one at a time
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def get_or_create_session(self, session_id: Optional[str] = None) -> str:
+        """Return the ID of a live session, creating a new one if needed, and mark it as used."""
+        session = None
+        if session_id and session_id in self._last_used:
+            session = await self.session_service.get_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            )
+        if session is None:
+            session = await self.session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+            self._locks[session.id] = asyncio.Lock()
+        self._last_used[session.id] = time.monotonic()
+        self._last_used.move_to_end(session.id)
+        return session.id
+
+    async def _evict(self) -> None:
+        """Delete sessions that are idle too long or over the session limit."""
+        now = time.monotonic()
+        while self._last_used:
+            session_id, last_used = next(iter(self._last_used.items()))
+            if len(self._last_used) <= self.max_sessions and now - last_used <= self.session_ttl:
+                break
+            if self._locks[session_id].locked():
+                break
+            del self._last_used[session_id]
+            del self._locks[session_id]
+            await self.session_service.delete_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            )
+
+    async def stream(self, query: str, session_id: Optional[str] = None,
+                     run_config: Optional[RunConfig] = None) -> AsyncGenerator[Event, None]:
+        """
+        Run the agent with a query, yielding events as the runner produces them.
+
+        Args:
+            query: The user query to process
+            session_id: Session to run in, usually from get_or_create_session
+            run_config: Run options, e.g. a streaming mode
+
+        Yields:
+            Event objects generated by the agent
+        """
+        session_id = await self.get_or_create_session(session_id)
+        user_content = types.Content(role="user", parts=[types.Part(text=query)])
+        async with self._locks[session_id]:
+            async with Aclosing(self.runner.run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=user_content,
+                run_config=run_config
+            )) as agen:
+                async for event in agen:
+                    yield event
+            self._last_used[session_id] = time.monotonic()
+
+        await self._evict()
+
+    async def run(self, query: str, session_id: Optional[str] = None) -> Tuple[str, List[Event]]:
+        """
+        Run the agent with a query, continuing a session if it is still live.
+
+        Args:
+            query: The user query to process
+            session_id: Session of an earlier query to follow up on, or None to start a new one
+
+        Returns:
+            The ID of the session used and the events generated by the agent
+        """
+        session_id = await self.get_or_create_session(session_id)
+        events: List[Event] = [event async for event in self.stream(query, session_id)]
+        return session_id, events
+
+    async def close(self) -> None:
+        """Close the runner and drop all sessions."""
+        await self.runner.close()
+        self._last_used.clear()
+        self._locks.clear()
+
+
+_runner: Optional[AgentRunner] = None
+
+
+def get_runner() -> AgentRunner:
+    """Return the shared AgentRunner, creating it on first use."""
+    global _runner
+    if _runner is None:
+        _runner = AgentRunner()
+    return _runner
+
+
+async def close_runner() -> None:
+    """Close the shared AgentRunner, if it was created."""
+    global _runner
+    if _runner is not None:
+        await _runner.close()
+        _runner = None
+
+
+async def run_agent(query: str, session_id: Optional[str] = None) -> List[Event]:
     """
     Run the maps agent with a query and return all events.
-    
+
     Args:
         query: The user query to process
-        
+        session_id: Session of an earlier query to follow up on, or None to start a new one
+
     Returns:
         List of Event objects generated by the agent
     """
-    # Create session service and session
-    session_service = InMemorySessionService()
-    session = await session_service.create_session(
-        app_name="maps_agent",
-        user_id="test_user"
-    )
-    
-    # Create content object
-    user_content = types.Content(role="user", parts=[types.Part(text=query)])
-    
-    # Create runner and run the agent
-    runner = Runner(session_service=session_service, app_name="maps_agent", agent=root_agent)
-    
-    events: List[Event] = []
-    async for event in runner.run_async(
-        user_id="test_user",
-        session_id=session.id,
-        new_message=user_content
-    ):
-        events.append(event)
-    
-    return events
\ No newline at end of file
+    _, events = await get_runner().run(query, session_id)
+    return events
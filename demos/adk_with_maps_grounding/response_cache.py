@@ -0,0 +1,315 @@
+"""
+Cache for Maps-grounded responses.
+
+Responses are keyed by the model, the normalized request contents and the
+grounding location. A cached response is fresh for `ttl` seconds; for a
+further `stale_ttl` seconds it is still served, while a refresh runs in the
+background (stale-while-revalidate). Entries are evicted least recently used
+first once the backend holds `max_entries`.
+
+Responses are stored as JSON, so grounding metadata, including the Maps
+widget context token, round-trips through the cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Protocol, Tuple, Union
+
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+Response = Union[types.GenerateContentResponse, str]
+
+
+def normalize_text(text: str) -> str:
+    """Fold case and collapse whitespace so trivially different queries share an entry."""
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(contents: list[types.Content], lat_lng: Tuple[float, float], model: str) -> str:
+    """Return the cache key for a request."""
+    normalized = []
+    for content in contents:
+        if content is None:
+            continue
+        parts = []
+        for part in content.parts or []:
+            if part.text is not None:
+                parts.append(normalize_text(part.text))
+            else:
+                parts.append(part.model_dump(mode="json", exclude_none=True))
+        normalized.append([content.role, parts])
+    payload = json.dumps([model, list(lat_lng), normalized], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    """Storage for cache entries: a serialized response and the time it was stored."""
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]: ...
+
+    def set(self, key: str, value: str, created: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """In-process LRU backend."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, created: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """On-disk LRU backend, shared by processes using the same file."""
+
+    def __init__(self, path: Union[str, Path] = ".cache/maps_responses.sqlite", max_entries: int = 10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_by_access ON responses (last_access);
+        """)
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                with self._db:
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row
+
+    def set(self, key: str, value: str, created: float) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, created, time.time())
+            )
+            excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (excess,)
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """TTL + LRU cache of GenerateContentResponses with stale-while-revalidate."""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 86400, stale_ttl: float = 86400):
+        """
+        Args:
+            backend: Where entries are stored; defaults to an in-process MemoryBackend
+            ttl: Seconds a response is served without refreshing it
+            stale_ttl: Further seconds a response is served while it is refreshed in the background
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        # Misses served by waiting on another request's call
+        self.coalesced = 0
+        self.refresh_errors = 0
+        self._lock = threading.Lock()
+        # Keys being generated or refreshed, so each is requested once at a time
+        self._refreshing: set[str] = set()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def lookup(self, key: str) -> Tuple[Optional[types.GenerateContentResponse], bool]:
+        """Return the cached response for a key, or None, and whether it is stale."""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None, False
+        value, created = entry
+        age = time.time() - created
+        if age > self.ttl + self.stale_ttl:
+            self.backend.delete(key)
+            return None, False
+        try:
+            return types.GenerateContentResponse.model_validate_json(value), age > self.ttl
+        except ValueError:
+            logger.warning("Dropping unreadable cache entry %s", key)
+            self.backend.delete(key)
+            return None, False
+
+    def store(self, key: str, response: Response) -> None:
+        """Cache a response, unless it carries no content."""
+        if not isinstance(response, types.GenerateContentResponse):
+            return
+        if not response.candidates or not response.candidates[0].content:
+            return
+        self.backend.set(key, response.model_dump_json(exclude_none=True), time.time())
+
+    def _count(self, response: Optional[types.GenerateContentResponse], stale: bool) -> None:
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            elif stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+    def _start_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def _refresh_failed(self, key: str, error: Exception) -> None:
+        with self._lock:
+            self.refresh_errors += 1
+        logger.warning("Refreshing cached response %s failed: %s", key, error)
+
+    def get_cached(self, key: str, refresh: Callable[[], Awaitable[Response]]) -> Optional[types.GenerateContentResponse]:
+        """Return a cached response or None, for callers that generate on a miss themselves.
+
+        Must be called from a running event loop: a stale response is
+        returned and refreshed with `refresh` in a background task.
+        """
+        response, stale = self.lookup(key)
+        self._count(response, stale)
+        if response is not None and stale and self._start_refresh(key):
+            task = asyncio.create_task(self._arefresh(key, refresh))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return response
+
+    async def aget_or_generate(self, key: str, generate: Callable[[], Awaitable[Response]]) -> Response:
+        """Return a cached response, calling `generate` on a miss.
+
+        Concurrent misses for the same key share one call. A stale response
+        is returned immediately and refreshed in a background task.
+        """
+        response = self.get_cached(key, generate)
+        if response is not None:
+            return response
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                response = await asyncio.shield(inflight)
+                with self._lock:
+                    self.coalesced += 1
+                return response
+            except asyncio.CancelledError:
+                # Generate here only if the request we were waiting on was cancelled
+                if not inflight.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await generate()
+            self.store(key, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # The caller re-raises; this only marks the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _arefresh(self, key: str, generate: Callable[[], Awaitable[Response]]) -> None:
+        try:
+            self.store(key, await generate())
+        except Exception as e:
+            self._refresh_failed(key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_generate(self, key: str, generate: Callable[[], Response]) -> Response:
+        """Synchronous aget_or_generate; stale responses are refreshed on a background thread."""
+        response, stale = self.lookup(key)
+        self._count(response, stale)
+        if response is not None:
+            if stale and self._start_refresh(key):
+                threading.Thread(target=self._refresh, args=(key, generate), daemon=True).start()
+            return response
+
+        response = generate()
+        self.store(key, response)
+        return response
+
+    def _refresh(self, key: str, generate: Callable[[], Response]) -> None:
+        try:
+            self.store(key, generate())
+        except Exception as e:
+            self._refresh_failed(key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        """Hit-rate metrics since the cache was created."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.backend),
+            "lookups": lookups,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else None,
+            "refresh_errors": self.refresh_errors,
+        }
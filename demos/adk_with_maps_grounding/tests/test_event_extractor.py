@@ -0,0 +1,102 @@
+"""Tests for EventExtractor against events recorded from the demo agents.
+
+The fixtures are the events `maps_agent` (SSE streaming) and `maps_tool_agent`
+produced for one question each, serialized with
+`event.model_dump_json(exclude_none=True, by_alias=True)`, one per line.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+from google.adk.events.event import Event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maps_agent.event_extractor import EventExtractor  # noqa: E402
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_events(name):
+    with open(FIXTURES / name) as f:
+        return [Event.model_validate_json(line) for line in f if line.strip()]
+
+
+def test_streamed_text_is_reported_once():
+    events = load_events("maps_agent_sse_events.jsonl")
+    extractor = EventExtractor()
+    deltas = [extractor.add(event)[0] for event in events]
+
+    final_text = "Try Transmitter Park for the waterfront, or McCarren Park for a run."
+    assert "".join(deltas) == final_text
+    # The final event repeats the streamed text and adds nothing
+    assert deltas[-1] == ""
+    assert extractor.result().text == final_text
+
+
+def test_text_so_far_is_available_while_streaming():
+    events = load_events("maps_agent_sse_events.jsonl")
+    extractor = EventExtractor()
+    extractor.add(events[0])
+    extractor.add(events[1])
+    assert extractor.result().text == "Try Transmitter Park "
+
+
+def test_grounded_places_are_new_once_and_deduplicated():
+    events = load_events("maps_agent_sse_events.jsonl")
+    extractor = EventExtractor()
+    new_places = [place for event in events for place in extractor.add(event)[1]]
+
+    expected = [
+        {'title': 'Transmitter Park', 'uri': 'https://maps.google.com/?cid=111', 'place_id': 'places/ChIJTransmitter'},
+        {'title': 'McCarren Park', 'uri': 'https://maps.google.com/?cid=222', 'place_id': 'places/ChIJMcCarren'},
+    ]
+    assert new_places == expected
+    result = extractor.result()
+    assert result.grounding_links == expected
+    assert result.widget_context_token == "widgetcontent/AcBXPQc-recorded"
+    assert extractor.widget_context_token == result.widget_context_token
+
+
+def test_extend_matches_incremental_extraction():
+    events = load_events("maps_agent_sse_events.jsonl")
+    incremental = EventExtractor()
+    for event in events:
+        incremental.add(event)
+    assert EventExtractor().extend(events).result() == incremental.result()
+
+
+def test_function_calls_and_responses_add_no_text():
+    events = load_events("maps_tool_agent_events.jsonl")
+    extractor = EventExtractor(author="maps_tool_agent")
+    for event in events:
+        parts = event.content.parts if event.content else []
+        has_text = any(part.text for part in parts)
+        text_before = extractor.result().text
+        delta, new_places = extractor.add(event)
+        if not has_text:
+            assert delta == ""
+            assert extractor.result().text == text_before
+        assert new_places == []
+
+    assert extractor.result().text == "Transmitter Park is closest."
+
+
+def test_events_from_other_authors_are_ignored():
+    events = load_events("maps_tool_agent_events.jsonl")
+    extractor = EventExtractor()  # expects author "maps_agent"
+    assert [extractor.add(event)[0] for event in events] == [""] * len(events)
+    assert extractor.result().text == ""
+
+
+def test_benchmark_extraction(capsys):
+    # Not a timing assertion: prints the per-event cost for comparison across changes
+    events = load_events("maps_agent_sse_events.jsonl") * 200
+    start = time.perf_counter()
+    EventExtractor().extend(events)
+    elapsed = time.perf_counter() - start
+    with capsys.disabled():
+        print(f"\nEventExtractor: {elapsed / len(events) * 1e6:.1f} us per event over {len(events)} events")
@@ -1,40 +1,52 @@
 from google import genai
 from google.genai import types
-import base64
+import functools
 import os
+from typing import AsyncIterator, Optional
 
-from google.genai import types
+import httpx
+
+from response_cache import ResponseCache, MemoryBackend, SqliteBackend, cache_key
+
+MODEL = "gemini-2.5-flash"
+
+# Default location used to ground Maps results
+DEFAULT_LAT_LNG = (40.7137864, -73.948351)
 
-def generate_with_maps_grounding(contents: list[types.Content]) -> types.GenerateContentResponse:
-  client = genai.Client(
+# Keep-alive connections shared by every call made through the client
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+
+@functools.lru_cache(maxsize=None)
+def get_client() -> genai.Client:
+  """Return the process-wide client; its HTTP connection pools are reused across calls."""
+  return genai.Client(
       vertexai=True,
       api_key=os.environ.get("GOOGLE_CLOUD_API_KEY"),
+      http_options=types.HttpOptions(
+          client_args={"limits": HTTP_LIMITS},
+          async_client_args={"limits": HTTP_LIMITS},
+      ),
   )
 
-  model = "gemini-2.5-flash"
-  contents = contents
-  # [
-  #   user_content
-  #   # types.Content(
-  #   #   role="user",
-  #   #   parts=[
-  #   #     types.Part.from_text(text=query)
-  #   #   ]
-  #   # ),
-  # ]
+
+@functools.lru_cache(maxsize=32)
+def get_generate_content_config(lat_lng: tuple[float, float] = DEFAULT_LAT_LNG) -> types.GenerateContentConfig:
+  """Return the config for a grounding location; built once and shared, so treat it as read-only."""
+  latitude, longitude = lat_lng
   tools = [
     types.Tool(google_maps=types.GoogleMaps()),
   ]
   tool_config = types.ToolConfig(
       retrieval_config = types.RetrievalConfig(
           lat_lng = types.LatLng(
-            latitude= 40.7137864,
-            longitude= -73.948351,
+            latitude= latitude,
+            longitude= longitude,
           ),
       ),
   )
 
-  generate_content_config = types.GenerateContentConfig(
+  return types.GenerateContentConfig(
     temperature = 1,
     top_p = 0.95,
     max_output_tokens = 65535,
@@ -58,19 +70,130 @@ def generate_with_maps_grounding(contents: list[types.Content]) -> types.Generat
     ),
   )
 
-  response = client.models.generate_content(
-      model = model,
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache() -> Optional[ResponseCache]:
+  """Return the process-wide response cache, configured from the environment.
+
+  MAPS_CACHE selects the backend: "memory" (default), "sqlite" or "off".
+  MAPS_CACHE_PATH is the SQLite file; MAPS_CACHE_TTL and MAPS_CACHE_STALE_TTL
+  are the fresh and stale-while-revalidate periods in seconds.
+  """
+  kind = os.environ.get("MAPS_CACHE", "memory")
+  if kind == "off":
+    return None
+  if kind == "sqlite":
+    backend = SqliteBackend(os.environ.get("MAPS_CACHE_PATH", ".cache/maps_responses.sqlite"))
+  else:
+    backend = MemoryBackend()
+  return ResponseCache(
+      backend,
+      ttl=float(os.environ.get("MAPS_CACHE_TTL", 86400)),
+      stale_ttl=float(os.environ.get("MAPS_CACHE_STALE_TTL", 86400)),
+  )
+
+
+def has_content(response: types.GenerateContentResponse) -> bool:
+  """True if the response's first candidate has content parts."""
+  return bool(response.candidates and response.candidates[0].content and response.candidates[0].content.parts)
+
+
+def generate_with_maps_grounding(contents: list[types.Content], lat_lng: tuple[float, float] = DEFAULT_LAT_LNG,
+                                 use_cache: bool = True) -> types.GenerateContentResponse:
+  def generate():
+    response = get_client().models.generate_content(
+        model = MODEL,
+        contents = contents,
+        config = get_generate_content_config(lat_lng),
+      )
+    if not has_content(response):
+        print("No content generated.")
+        print(response)
+        return "No content generated."
+
+    return response
+
+  cache = get_response_cache() if use_cache else None
+  if cache is None:
+    return generate()
+  return cache.get_or_generate(cache_key(contents, lat_lng, MODEL), generate)
+
+
+async def generate_with_maps_grounding_async(contents: list[types.Content], lat_lng: tuple[float, float] = DEFAULT_LAT_LNG,
+                                             use_cache: bool = True) -> types.GenerateContentResponse:
+  """Like generate_with_maps_grounding, but without blocking the event loop."""
+  async def generate():
+    response = await get_client().aio.models.generate_content(
+        model = MODEL,
+        contents = contents,
+        config = get_generate_content_config(lat_lng),
+      )
+    if not has_content(response):
+        print("No content generated.")
+        print(response)
+        return "No content generated."
+
+    return response
+
+  cache = get_response_cache() if use_cache else None
+  if cache is None:
+    return await generate()
+  return await cache.aget_or_generate(cache_key(contents, lat_lng, MODEL), generate)
+
+
+def merge_stream_chunks(chunks: list[types.GenerateContentResponse]) -> types.GenerateContentResponse:
+  """Combine streamed chunks into one response, as generate_content would have returned it."""
+  text = []
+  grounding_metadata = None
+  finish_reason = None
+  for chunk in chunks:
+    if not chunk.candidates:
+      continue
+    candidate = chunk.candidates[0]
+    if candidate.content and candidate.content.parts:
+      text.extend(part.text for part in candidate.content.parts if part.text and not part.thought)
+    grounding_metadata = candidate.grounding_metadata or grounding_metadata
+    finish_reason = candidate.finish_reason or finish_reason
+
+  usage_metadata = next((chunk.usage_metadata for chunk in reversed(chunks) if chunk.usage_metadata), None)
+  return types.GenerateContentResponse(
+    candidates=[types.Candidate(
+      content=types.Content(role="model", parts=[types.Part(text="".join(text))]) if text else None,
+      grounding_metadata=grounding_metadata,
+      finish_reason=finish_reason,
+    )],
+    usage_metadata=usage_metadata,
+    model_version=chunks[-1].model_version if chunks else None,
+  )
+
+
+async def generate_with_maps_grounding_stream(contents: list[types.Content], lat_lng: tuple[float, float] = DEFAULT_LAT_LNG,
+                                              use_cache: bool = True) -> AsyncIterator[types.GenerateContentResponse]:
+  """Yield the response in chunks as it is generated.
+
+  A cached response is yielded as a single chunk; a streamed response is
+  cached once it is complete.
+  """
+  cache = get_response_cache() if use_cache else None
+  key = cache_key(contents, lat_lng, MODEL)
+  if cache is not None:
+    cached = cache.get_cached(key, lambda: generate_with_maps_grounding_async(contents, lat_lng, use_cache=False))
+    if cached is not None:
+      yield cached
+      return
+
+  chunks = []
+  stream = await get_client().aio.models.generate_content_stream(
+      model = MODEL,
       contents = contents,
-      config = generate_content_config,
+      config = get_generate_content_config(lat_lng),
     )
-  if not response.candidates or not response.candidates[0].content or not response.candidates[0].content.parts:
-      print("No content generated.")
-      print(response)
-      return "No content generated."
-    
-  # print(response)
-  return response
-  # return response.candidates[0].content.parts[0].text
+  async for chunk in stream:
+    chunks.append(chunk)
+    yield chunk
+
+  if cache is not None and chunks:
+    cache.store(key, merge_stream_chunks(chunks))
 
 
 def generate_with_maps_grounding__as_tool(query: str) -> str:
@@ -82,9 +205,7 @@ def generate_with_maps_grounding__as_tool(query: str) -> str:
       ]
     ),
   ])
-  if not response.candidates or not response.candidates[0].content or not response.candidates[0].content.parts:
-      print("No content generated.")
-      print(response)
-      return "No content generated."
-    
-  return response.text
\ No newline at end of file
+  if isinstance(response, str):
+      return response
+
+  return response.text